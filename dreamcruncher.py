@@ -7,7 +7,7 @@ Created on Fri Aug 22 14:01:41 2025
 import tkinter as tk
 from tkinter import scrolledtext
 import tkinter.font as tkfont
-import copy
+from tkinter import filedialog, messagebox
 import spacy # additionally python -m spacy download en_core_web_sm
 from spellchecker import SpellChecker # pip install pyspellchecker
 
@@ -22,45 +22,2196 @@ import platform
 import requests
 import subprocess, sys
 
+import hashlib
+import threading
+import os
+import sqlite3
+import time
+import csv
+import json
+import itertools
+import bisect
+import difflib
+import pickle
+import struct
+import zlib
+import gzip
+import bz2
+import mmap
+import queue
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from urllib.parse import urlsplit
+from collections import Counter, OrderedDict, namedtuple
+from collections.abc import Sequence
+from array import array
+
+
+# ---------- parsed Doc cache ----------
+class DocCache:
+    """
+    Bounded LRU cache of parsed spaCy Docs, keyed by a hash of the text.
+    An entry only goes stale when the text it was parsed from is edited,
+    so callers discard the old text whenever a report changes.
+    """
+    def __init__(self, parse, maxsize=2048):
+        self.parse = parse
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._docs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text):
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def __call__(self, text):
+        key = self.key(text)
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is not None:
+                self._docs.move_to_end(key)
+                self.hits += 1
+                return doc
+            self.misses += 1
+
+        doc = self.parse(text)
+        self.add(text, doc)
+        return doc
+
+    def add(self, text, doc):
+        key = self.key(text)
+        with self._lock:
+            self._docs[key] = doc
+            self._docs.move_to_end(key)
+            while len(self._docs) > self.maxsize:
+                self._docs.popitem(last=False)  # evict least recently used
+
+    def discard(self, text):
+        with self._lock:
+            self._docs.pop(self.key(text), None)
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, text):
+        return self.key(text) in self._docs
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._docs),
+            "maxsize": self.maxsize,
+        }
+
+
+class LRUDict(OrderedDict):
+    """
+    Dict that keeps at most maxsize entries, evicting the least recently
+    used one like DocCache. Safe to share between the GUI and background
+    threads; a missing entry just means recomputing it.
+    """
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = super().__getitem__(key)
+            self.move_to_end(key)
+            return value
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self[key] if key in self else default
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, value)
+            self.move_to_end(key)
+            while len(self) > self.maxsize:
+                self.popitem(last=False)
+
+    def pop(self, key, *default):
+        with self._lock:
+            return super().pop(key, *default)
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+
+
+# ---------- persistent lookup cache ----------
+def default_cache_dir():
+    return os.path.join(os.path.expanduser("~"), ".dreamcruncher")
+
+
+class LookupCache:
+    """
+    Persistent cache of resolved entity lookups, e.g. Wikidata occupations
+    and place types. Entries live in an SQLite file with an optional expiry
+    (ttl in seconds) and are served through an in-memory LRU. Keys are
+    (kind, normalized entity); a cached value of None means "nothing found".
+    Use path=":memory:" for a cache that is not written to disk.
+    """
+    MISSING = object()  # returned by get() when nothing usable is cached
+
+    def __init__(self, path=None, ttl=30 * 24 * 3600, maxsize=4096):
+        if path is None:
+            path = os.path.join(default_cache_dir(), "lookup_cache.sqlite")
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # (kind, key) -> (value, expires)
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS lookups ("
+            "kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT, expires REAL, "
+            "PRIMARY KEY (kind, key))"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def normalize(entity):
+        return " ".join(entity.split()).casefold()
+
+    def get(self, kind, entity):
+        key = (kind, self.normalize(entity))
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                entry = self._db.execute(
+                    "SELECT value, expires FROM lookups WHERE kind = ? AND key = ?", key
+                ).fetchone()
+            if entry is None or (entry[1] is not None and entry[1] < now):
+                self._memory.pop(key, None)
+                self.misses += 1
+                return self.MISSING
+
+            self._remember(key, entry)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, kind, entity, value, ttl=MISSING):
+        self.set_many(kind, {entity: value}, ttl)
+
+    def set_many(self, kind, entries, ttl=MISSING):
+        """Store {entity: value}; ttl=None stores entries that never expire."""
+        ttl = self.ttl if ttl is self.MISSING else ttl
+        expires = None if ttl is None else time.time() + ttl
+        rows = [(kind, self.normalize(entity), value, expires) for entity, value in entries.items()]
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?)", rows)
+            self._db.commit()
+            for row in rows:
+                self._remember(row[:2], row[2:])
+
+    def _remember(self, key, entry):
+        self._memory[key] = tuple(entry)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def preload(self, source, kind=None):
+        """
+        Fill the cache offline, without expiry. `source` is either a dict
+        {entity: value} (requires `kind`) or a CSV file with the columns
+        kind, entity, value. An empty value means "nothing found".
+        """
+        if isinstance(source, dict):
+            self.set_many(kind, source, ttl=None)
+            return
+
+        by_kind = {}
+        with open(source, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                by_kind.setdefault(row["kind"], {})[row["entity"]] = row["value"] or None
+        for k, entries in by_kind.items():
+            self.set_many(k, entries, ttl=None)
+
+    def purge_expired(self):
+        with self._lock:
+            self._db.execute("DELETE FROM lookups WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+            self._db.commit()
+            self._memory.clear()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# ---------- Wikidata client ----------
+class WikidataClient:
+    """
+    Keep-alive, connection-pooled client for Wikidata's wbsearchentities.
+    Requests are rate limited per host (`rate` requests per second) and
+    retried with exponential backoff on connection errors, timeouts, 429
+    and 5xx answers. A host that stays unreachable after all retries is
+    skipped for `cooldown` seconds, so offline runs fail fast.
+    """
+    URL = "https://www.wikidata.org/w/api.php"
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, url=None, max_workers=8, rate=10.0, retries=3, backoff=0.5,
+                 timeout=5, cooldown=60):
+        self.url = url or self.URL
+        self.max_workers = max_workers
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cooldown = cooldown
+
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "Python"
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._next_slot = {}     # host -> earliest time of the next request
+        self._down_until = {}    # host -> time until which it counts as unreachable
+
+    def _wait_turn(self, host):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + 1.0 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def search(self, entity):
+        """
+        Description of the best match for an entity (lowercase), or None if
+        there is no match. Raises requests.RequestException / ValueError.
+        """
+        host = urlsplit(self.url).netloc
+        with self._lock:
+            down = self._down_until.get(host, 0) > time.monotonic()
+        if down:
+            raise requests.ConnectionError(f"{host} is unreachable")
+
+        params = {
+            "action": "wbsearchentities",
+            "search": entity,
+            "language": "en",
+            "limit": 1,
+            "format": "json"
+        }
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * 2 ** attempt
+            self._wait_turn(host)
+            try:
+                response = self.session.get(self.url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    with self._lock:
+                        self._down_until[host] = time.monotonic() + self.cooldown
+                    raise
+                time.sleep(delay)
+                continue
+
+            if response.status_code in self.RETRY_STATUS and attempt < self.retries:
+                try:
+                    delay = max(delay, float(response.headers.get("Retry-After", 0)))
+                except ValueError:
+                    pass
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            data = response.json()
+            if not data.get("search"):
+                return None
+            return data["search"][0].get("description", "").lower()
+
+    def search_many(self, entities):
+        """
+        Look up entities concurrently on a bounded thread pool. Returns
+        {entity: description}; entities whose lookup failed are left out.
+        """
+        def search(entity):
+            try:
+                return entity, self.search(entity)
+            except (requests.RequestException, ValueError) as e:
+                return entity, e
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for entity, description in pool.map(search, entities):
+                if not isinstance(description, Exception):
+                    results[entity] = description
+        return results
+
+
+# ---------- offline gazetteer ----------
+def iter_wikidata_entities(source):
+    """
+    Yield the entities (dicts) of a Wikidata JSON dump, i.e. a JSON array
+    with one entity per line, optionally .gz or .bz2 compressed and read
+    line by line. Small fixtures may also be a .jsonl file, any JSON list
+    (also on a single line), or an iterable of entity dicts.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        yield from source
+        return
+
+    opener = {".gz": gzip.open, ".bz2": bz2.open}.get(os.path.splitext(source)[1].lower(), open)
+    with opener(source, "rt", encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            line = line.strip().rstrip(",")
+            if line in ("", "[", "]"):
+                continue
+            try:
+                entity = json.loads(line)
+            except ValueError:
+                if n > 1:
+                    raise
+                break  # not one entity per line, e.g. an indented fixture
+            if isinstance(entity, list):
+                yield from entity  # the whole array on one line
+            else:
+                yield entity
+        else:
+            return
+    with opener(source, "rt", encoding="utf-8") as f:
+        entities = json.load(f)
+    yield from entities if isinstance(entities, list) else [entities]
+
+
+class Gazetteer:
+    """
+    Offline replacement for Wikidata lookups: the English descriptions of
+    humans with an occupation ("name") and of places with coordinates
+    ("place"), keyed by their normalized English labels and aliases (see
+    LookupCache.normalize). Built once from a Wikidata dump with build();
+    the file is memory-mapped and searched by bisection, so opening it is
+    instant and lookups read only a few pages. Where several entities
+    share a label, exact labels win over aliases and then the entity with
+    the most sitelinks. Given and family names are indexed as well, so a
+    lone first name resolves to "male given name" (an initial) instead of
+    the occupation of a famous namesake known by it. Results are close to,
+    but not guaranteed to equal, the top hit of the online search.
+
+    File layout (native byte order): magic, entry and value counts, then
+    the key offsets, the value id of each key, the value offsets, the
+    sorted keys ("kind\tlabel") and the deduplicated values, all UTF-8.
+    """
+    MAGIC = b"DCGAZ1" + (b"LE" if sys.byteorder == "little" else b"BE")
+    HUMAN = "Q5"  # instance of (P31) human
+    # instance of (P31) given name, male/female/unisex given name, family name
+    PERSONAL_NAMES = frozenset({"Q202444", "Q12308941", "Q11879590", "Q3409032", "Q101352"})
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:8] != self.MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a gazetteer built on this platform")
+
+        n_keys, n_values = struct.unpack_from("=II", self._map, 8)
+        view = memoryview(self._map)
+        pos = 16
+
+        def table(n):
+            nonlocal pos
+            section = view[pos:pos + 4 * n].cast("I")
+            pos += 4 * n
+            return section
+
+        self._key_offsets = table(n_keys + 1)
+        self._value_ids = table(n_keys)
+        self._value_offsets = table(n_values + 1)
+        self._keys_start = pos
+        self._values_start = pos + self._key_offsets[n_keys]
+        self._view = view
+
+    def __len__(self):
+        return len(self._value_ids)
+
+    def _key(self, i):
+        return self._map[self._keys_start + self._key_offsets[i]:self._keys_start + self._key_offsets[i + 1]]
+
+    def get(self, kind, entity):
+        """Description of a "name" or "place", or None if it is not in the gazetteer."""
+        key = f"{kind}\t{LookupCache.normalize(entity)}".encode("utf-8")
+        lo, hi = 0, len(self._value_ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(self._value_ids) or self._key(lo) != key:
+            return None
+        v = self._value_ids[lo]
+        start = self._values_start + self._value_offsets[v]
+        return self._map[start:self._values_start + self._value_offsets[v + 1]].decode("utf-8")
+
+    def search_many(self, kind, entities):
+        """{entity: description} like WikidataClient.search_many, without the network."""
+        return {entity: self.get(kind, entity) for entity in entities}
+
+    def close(self):
+        for table in (self._key_offsets, self._value_ids, self._value_offsets, self._view):
+            table.release()
+        self._map.close()
+
+    @staticmethod
+    def _claim_ids(entity, prop):
+        ids = []
+        for claim in entity.get("claims", {}).get(prop, []):
+            if claim.get("rank") == "deprecated":
+                continue
+            value = claim.get("mainsnak", {}).get("datavalue", {}).get("value")
+            if isinstance(value, dict) and "id" in value:
+                ids.append(value["id"])
+        return ids
+
+    @classmethod
+    def build(cls, source, path, min_sitelinks=0, language="en"):
+        """
+        Compile a gazetteer from a Wikidata JSON dump or fixture (see
+        iter_wikidata_entities) and open it. Entities need a description in
+        `language`; humans (P31 Q5) also an occupation (P106) and places
+        a coordinate location (P625). min_sitelinks keeps only entities
+        known to that many Wikimedia sites, which keeps builds from the
+        full dump small; given and family names are always kept.
+
+        The labels are collected and sorted in a temporary SQLite database
+        next to `path`, so the build needs little memory even for the
+        full dump.
+        """
+        scratch = f"{path}.build.sqlite"
+        if os.path.exists(scratch):
+            os.remove(scratch)  # left over from an interrupted build
+        db = sqlite3.connect(scratch)
+        try:
+            db.executescript("""
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                CREATE TABLE descriptions (id INTEGER PRIMARY KEY, text TEXT UNIQUE);
+                CREATE TABLE candidates (key BLOB, is_label INTEGER, sitelinks INTEGER, description INTEGER);
+            """)
+            description_ids = LRUDict(100_000)
+
+            def description_id(text):
+                if text not in description_ids:
+                    db.execute("INSERT OR IGNORE INTO descriptions (text) VALUES (?)", (text,))
+                    description_ids[text] = db.execute("SELECT id FROM descriptions WHERE text = ?", (text,)).fetchone()[0]
+                return description_ids[text]
+
+            rows = []
+            for entity in iter_wikidata_entities(source):
+                description = entity.get("descriptions", {}).get(language, {}).get("value")
+                if not description:
+                    continue
+                claims = entity.get("claims", {})
+                instance_of = cls._claim_ids(entity, "P31")
+                sitelinks = len(entity.get("sitelinks", {}))
+                if cls.PERSONAL_NAMES.intersection(instance_of):
+                    kind = "name"  # kept regardless of min_sitelinks
+                elif sitelinks < min_sitelinks:
+                    continue
+                elif cls.HUMAN in instance_of:
+                    if "P106" not in claims:
+                        continue
+                    kind = "name"
+                elif "P625" in claims:
+                    kind = "place"
+                else:
+                    continue
+
+                value = description_id(description.lower())
+                labels = [(1, entity.get("labels", {}).get(language, {}).get("value"))]
+                labels += [(0, alias.get("value")) for alias in entity.get("aliases", {}).get(language, [])]
+                for is_label, label in labels:
+                    if label:
+                        key = f"{kind}\t{LookupCache.normalize(label)}".encode("utf-8")
+                        rows.append((key, is_label, sitelinks, value))
+                if len(rows) >= 10_000:
+                    db.executemany("INSERT INTO candidates VALUES (?, ?, ?, ?)", rows)
+                    rows.clear()
+            db.executemany("INSERT INTO candidates VALUES (?, ?, ?, ?)", rows)
+
+            # one winner per key: labels before aliases, then most sitelinks, then first seen;
+            # BLOB keys sort bytewise, the order get() bisects in
+            db.executescript("""
+                CREATE TABLE entries (key BLOB PRIMARY KEY, description INTEGER) WITHOUT ROWID;
+                INSERT INTO entries
+                    SELECT key, description FROM (
+                        SELECT key, description, ROW_NUMBER() OVER (
+                            PARTITION BY key ORDER BY is_label DESC, sitelinks DESC, rowid
+                        ) AS rank FROM candidates
+                    ) WHERE rank = 1;
+                DROP TABLE candidates;
+                CREATE TABLE used (description INTEGER PRIMARY KEY, value INTEGER);
+                INSERT INTO used
+                    SELECT description, ROW_NUMBER() OVER (ORDER BY description) - 1
+                    FROM (SELECT DISTINCT description FROM entries);
+            """)
+            n_keys = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            n_values = db.execute("SELECT COUNT(*) FROM used").fetchone()[0]
+            values_sql = """SELECT CAST(text AS BLOB) FROM used
+                            JOIN descriptions ON descriptions.id = used.description ORDER BY value"""
+
+            def write_offsets(f, lengths):
+                offsets, offset = array("I", [0]), 0
+                for (length,) in lengths:
+                    offset += length
+                    offsets.append(offset)
+                    if len(offsets) >= 65_536:
+                        offsets.tofile(f)
+                        offsets = array("I")
+                offsets.tofile(f)
+
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(cls.MAGIC + struct.pack("=II", n_keys, n_values))
+                write_offsets(f, db.execute("SELECT length(key) FROM entries ORDER BY key"))
+                value_ids = db.execute("""SELECT value FROM entries
+                                          JOIN used ON used.description = entries.description ORDER BY key""")
+                for chunk in iter(lambda: value_ids.fetchmany(65_536), []):
+                    array("I", (value for value, in chunk)).tofile(f)
+                write_offsets(f, ((len(value),) for value, in db.execute(values_sql)))
+                for key, in db.execute("SELECT key FROM entries ORDER BY key"):
+                    f.write(key)
+                for value, in db.execute(values_sql):
+                    f.write(value)
+        finally:
+            db.close()
+            os.remove(scratch)
+        os.replace(tmp, path)  # a failed build leaves an existing gazetteer intact
+        return cls(path)
+
+
+# ---------- streaming corpora ----------
+def iter_report_chunks(source, chunk_size=1000, column="report"):
+    """
+    Yield lists of at most chunk_size reports from an iterable of strings
+    or from a .csv, .jsonl or .parquet file (reports in `column`), without
+    reading the whole corpus into memory. Parquet needs pyarrow.
+    """
+    if not isinstance(source, (str, os.PathLike)):
+        iterator = iter(source)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    path = os.fspath(source)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        for frame in pd.read_csv(path, usecols=[column], chunksize=chunk_size, keep_default_na=False):
+            yield frame[column].astype(str).tolist()
+    elif ext in (".jsonl", ".ndjson"):
+        with open(path, encoding="utf-8") as f:
+            lines = (json.loads(line) for line in f if line.strip())
+            reports = (r if isinstance(r, str) else r[column] for r in lines)
+            yield from iter_report_chunks(reports, chunk_size)
+    elif ext == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading parquet files needs pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=[column]):
+            yield batch.column(0).to_pylist()
+    else:
+        raise ValueError(f"Unsupported report file type: {ext}")
+
+
+class ChunkWriter:
+    """Append DataFrames to a .csv, .jsonl or .parquet file chunk by chunk."""
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.ext = os.path.splitext(self.path)[1].lower()
+        if self.ext not in (".csv", ".jsonl", ".ndjson", ".parquet"):
+            raise ValueError(f"Unsupported output file type: {self.ext}")
+        self._first = True
+        self._parquet = None
+
+    def write(self, df):
+        if self.ext == ".csv":
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        elif self.ext == ".parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        else:
+            with open(self.path, "w" if self._first else "a", encoding="utf-8") as f:
+                if len(df):
+                    df.to_json(f, orient="records", lines=True, force_ascii=False)
+        self._first = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+
+# ---------- report documents ----------
+class ReportDocument:
+    """
+    One report as a piece table: its text is a list of pieces (string,
+    start, end) that point into the original report or into the inserted
+    replacement strings, so an edit only adds a few pieces. Every edit is
+    journaled as (start, end, old_text, new_text, change_type) with just
+    the replaced span, `end` being the end of new_text. The current text
+    is joined from the pieces on demand and kept until the next edit.
+    """
+    __slots__ = ("original", "pieces", "journal", "_starts", "_text")
+
+    def __init__(self, original):
+        self.original = original
+        self.pieces = [(original, 0, len(original))] if original else []
+        self.journal = []
+        self._starts = None  # offset of each piece in the current text
+        self._text = original
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = "".join(s[a:b] for s, a, b in self.pieces)
+        return self._text
+
+    def __len__(self):
+        return sum(b - a for _, a, b in self.pieces)
+
+    def _slice(self, start, end):
+        """Pieces covering [start, end) of the current text."""
+        if self._starts is None:
+            self._starts = list(itertools.accumulate((b - a for _, a, b in self.pieces), initial=0))
+        starts = self._starts
+        out = []
+        k = max(bisect.bisect_right(starts, start) - 1, 0)
+        while k < len(self.pieces) and starts[k] < end:
+            s, a, b = self.pieces[k]
+            lo = a + max(start - starts[k], 0)
+            hi = a + min(end - starts[k], b - a)
+            if lo < hi:
+                out.append((s, lo, hi))
+            k += 1
+        return out
+
+    def replace(self, replacements, change_type):
+        """
+        Apply (start, end, replacement) spans of the current text in one
+        splice. Overlapping spans are skipped. Returns the applied spans.
+        """
+        text = self.text
+        pieces = []
+        applied = []
+        last = 0
+        for start, end, repl in sorted(replacements, key=lambda x: x[0]):
+            if start < last:
+                continue  # overlaps the previous replacement
+            pieces += self._slice(last, start)
+            if repl:
+                pieces.append((repl, 0, len(repl)))
+            applied.append((start, end, repl))
+            last = end
+        if not applied:
+            return applied
+        pieces += self._slice(last, len(text))
+
+        # journal from the end to the start, as the edits were applied before
+        for start, end, repl in reversed(applied):
+            self.journal.append((start, start + len(repl), text[start:end], repl, change_type))
+
+        self.pieces = pieces
+        self._starts = None
+        self._text = None
+        return applied
+
+
+DIFF_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def diff_spans(old, new):
+    """
+    The (start, end, replacement) span edits of old that give new, from a
+    diff of their whitespace-separated tokens, so a corrected word is one
+    edit. The unchanged start and end are skipped before diffing, up to
+    the word they end in, and so are the punctuation and whitespace that
+    an edited span starts or ends with on both sides.
+    """
+    if old == new:
+        return []
+    is_word = lambda c: c.isalnum() or c == "_"
+
+    prefix = len(os.path.commonprefix([old, new]))
+    while prefix > 0 and is_word(old[prefix - 1]):
+        prefix -= 1
+    suffix = len(os.path.commonprefix([old[prefix:][::-1], new[prefix:][::-1]]))
+    while suffix > 0 and is_word(old[len(old) - suffix]):
+        suffix -= 1
+    old_mid = old[prefix:len(old) - suffix]
+    new_mid = new[prefix:len(new) - suffix]
+
+    old_tokens = DIFF_TOKEN.findall(old_mid)
+    new_tokens = DIFF_TOKEN.findall(new_mid)
+    offsets = list(itertools.accumulate(map(len, old_tokens), initial=prefix))
+
+    spans = []
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        start, end, repl = offsets[i1], offsets[i2], "".join(new_tokens[j1:j2])
+        while start < end and repl and old[start] == repl[0] and not is_word(repl[0]):
+            start, repl = start + 1, repl[1:]
+        while start < end and repl and old[end - 1] == repl[-1] and not is_word(repl[-1]):
+            end, repl = end - 1, repl[:-1]
+        spans.append((start, end, repl))
+    return spans
+
+
+class CleanedReports(Sequence):
+    """
+    List of the current texts of ReportDocuments. Assigning a report calls
+    set_report(idx, text), which edits and tracks it; without set_report
+    the list is read-only. It compares, concatenates and pickles like a
+    plain list of the texts.
+    """
+    def __init__(self, documents, set_report=None):
+        self.documents = documents
+        self.set_report = set_report
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [doc.text for doc in self.documents[i]]
+        return self.documents[i].text
+
+    def __setitem__(self, i, text):
+        if self.set_report is None:
+            raise TypeError("these reports are read-only")
+        self.set_report(range(len(self.documents))[i], text)  # negative indices too
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __eq__(self, other):
+        if isinstance(other, (list, CleanedReports)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __add__(self, other):
+        if isinstance(other, (list, CleanedReports)):
+            return list(self) + list(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, list):
+            return other + list(self)
+        return NotImplemented
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ReportResults:
+    """
+    Per-report results of one detector (names, places, keyword hits), kept
+    between steps. Edited reports are marked dirty and are the only ones
+    the detector runs on again; reports without a result take no space.
+    A result computed on a worker thread is stored with set_if_unchanged,
+    which cannot interleave with mark_dirty.
+    """
+    def __init__(self, n_reports=0):
+        self.results = {}  # report index -> non-empty result
+        self.dirty = set(range(n_reports))
+        self._lock = threading.Lock()
+
+    def mark_dirty(self, idx):
+        with self._lock:
+            self.results.pop(idx, None)
+            self.dirty.add(idx)
+
+    def set_if_unchanged(self, idx, result, current, text):
+        """
+        set() the result computed from `text` unless current() (the
+        report's text now) differs, i.e. it was edited meanwhile and stays
+        dirty. Returns whether it was stored.
+        """
+        with self._lock:
+            if current() != text:
+                return False
+            self.set(idx, result)
+            return True
+
+    def set(self, idx, result):
+        if result:
+            self.results[idx] = result
+        else:
+            self.results.pop(idx, None)
+        self.dirty.discard(idx)
+
+
+# ---------- tracked changes ----------
+class ChangeTable:
+    """
+    Tracked changes in columns: report_idx, start and end in preallocated
+    int arrays, change types as small codes and the texts in lists. The
+    reports are not copied into the rows; they are kept once and looked up
+    by report_idx (add `offset` when the reports are a chunk of a larger
+    corpus). write() goes straight to Parquet/Arrow or streams CSV/JSONL;
+    to_dataframe(wide=True) materializes the classic one-row-per-change
+    view with both full reports.
+    """
+    COLUMNS = ("report_idx", "change_type", "start", "end", "old_text", "new_text", "context")
+
+    def __init__(self, original_reports, cleaned_reports, changes, context_window=10, offset=0):
+        self.original_reports = original_reports
+        self.cleaned_reports = cleaned_reports
+        self.offset = offset
+
+        n = sum(len(report_changes) for report_changes in changes.values())
+        self.report_idx = array("l", [0]) * n
+        self.start = array("l", [0]) * n
+        self.end = array("l", [0]) * n
+        self.type_codes = array("b", [0]) * n
+        self.types = []  # code -> change type
+        self.old_text = [None] * n
+        self.new_text = [None] * n
+        self.context = [None] * n
+
+        codes = {}
+        k = 0
+        for i, report_changes in changes.items():
+            original = original_reports[i]
+            for start, end, old_text, new_text, change_type in report_changes:
+                code = codes.get(change_type)
+                if code is None:
+                    code = codes[change_type] = len(self.types)
+                    self.types.append(change_type)
+
+                # get context from original report
+                start_ctx = max(0, start - context_window)
+                end_ctx = min(len(original), end + context_window)
+
+                self.report_idx[k] = i
+                self.start[k] = start
+                self.end[k] = end
+                self.type_codes[k] = code
+                self.old_text[k] = old_text
+                self.new_text[k] = new_text
+                self.context[k] = original[start_ctx:end_ctx].replace("\n", " ")
+                k += 1
+
+    def __len__(self):
+        return len(self.report_idx)
+
+    def columns(self):
+        """{column: values}, without copying the texts."""
+        return {
+            "report_idx": [i + self.offset for i in self.report_idx] if self.offset else self.report_idx,
+            "change_type": [self.types[c] for c in self.type_codes],
+            "start": self.start,
+            "end": self.end,
+            "old_text": self.old_text,
+            "new_text": self.new_text,
+            "context": self.context,
+        }
+
+    def to_dataframe(self, wide=False):
+        """
+        One row per change. wide=True adds the full original_report and
+        cleaned_report of each change, in the column order of the
+        tracked_changes DataFrame.
+        """
+        if not wide:
+            df = pd.DataFrame({
+                "report_idx": pd.Series(self.report_idx, dtype="int64") + self.offset,
+                "change_type": pd.Categorical.from_codes(list(self.type_codes), self.types),
+                "start": pd.Series(self.start, dtype="int64"),
+                "end": pd.Series(self.end, dtype="int64"),
+                "old_text": self.old_text,
+                "new_text": self.new_text,
+                "context": self.context,
+            })
+            return df
+
+        if not len(self):  # like a DataFrame of no rows
+            return pd.DataFrame([])
+        return pd.DataFrame({
+            "report_idx": pd.Series(self.report_idx, dtype="int64") + self.offset,
+            "original_report": [self.original_reports[i] for i in self.report_idx],
+            "cleaned_report": [self.cleaned_reports[i] for i in self.report_idx],
+            "change_type": [self.types[c] for c in self.type_codes],
+            "old_text": self.old_text,
+            "new_text": self.new_text,
+            "context": self.context,
+        })
+
+    def reports_frame(self):
+        """report_idx, original_report and cleaned_report of each changed report, once."""
+        changed = sorted(set(self.report_idx))
+        return pd.DataFrame({
+            "report_idx": [i + self.offset for i in changed],
+            "original_report": [self.original_reports[i] for i in changed],
+            "cleaned_report": [self.cleaned_reports[i] for i in changed],
+        })
+
+    def to_arrow(self):
+        import pyarrow as pa
+        columns = self.columns()
+        for name in ("report_idx", "start", "end"):
+            columns[name] = pa.array(list(columns[name]), pa.int64())
+        columns["change_type"] = pa.DictionaryArray.from_arrays(
+            pa.array(self.type_codes, pa.int8()), pa.array(self.types, pa.string())
+        )
+        return pa.table(columns)
+
+    def write(self, path, reports_path=None):
+        """
+        Write the changes to a .parquet, .arrow/.feather, .csv or .jsonl
+        file (CSV and JSONL are streamed row by row), and the changed
+        reports once to reports_path (.csv, .jsonl or .parquet).
+        """
+        path = os.fspath(path)
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".parquet":
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("Writing parquet files needs pyarrow: pip install pyarrow")
+            pq.write_table(self.to_arrow(), path)
+        elif ext in (".arrow", ".feather"):
+            try:
+                import pyarrow.feather as feather
+            except ImportError:
+                raise ImportError("Writing Arrow files needs pyarrow: pip install pyarrow")
+            feather.write_feather(self.to_arrow(), path)
+        elif ext in (".csv", ".jsonl", ".ndjson"):
+            columns = self.columns()
+            rows = zip(*(columns[name] for name in self.COLUMNS))
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                if ext == ".csv":
+                    writer = csv.writer(f)
+                    writer.writerow(self.COLUMNS)
+                    writer.writerows(rows)
+                else:
+                    for row in rows:
+                        f.write(json.dumps(dict(zip(self.COLUMNS, row)), ensure_ascii=False) + "\n")
+        else:
+            raise ValueError(f"Unsupported output file type: {ext}")
+
+        if reports_path is not None:
+            writer = ChunkWriter(reports_path)
+            writer.write(self.reports_frame())
+            writer.close()
+
+
+# ---------- session checkpoints ----------
+class SessionLog:
+    """
+    Append-only checkpoint file of a review session. Each record is a
+    tuple, pickled, zlib-compressed and written with its length, then
+    flushed, so a crash loses at most the record being written; a
+    truncated last record is ignored when reading. Records hold only
+    built-in types, so that a checkpoint does not depend on the module
+    name it was written under. Only read checkpoints you wrote yourself,
+    as unpickling can run code.
+    """
+    HEADER = struct.Struct("<I")
+
+    def __init__(self, path, append=False, overwrite=False):
+        self.path = os.fspath(path)
+        if not (append or overwrite) and os.path.isfile(self.path) and os.path.getsize(self.path):
+            raise FileExistsError(
+                f"{self.path} already holds a checkpoint; resume it with DreamCruncher.resume "
+                "or pass overwrite_checkpoint=True to start over"
+            )
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "ab" if append else "wb")
+        self._lock = threading.Lock()
+
+    def append(self, *record):
+        data = zlib.compress(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            if self._file.closed:
+                return  # e.g. a background task finishing after the window closed
+            self._file.write(self.HEADER.pack(len(data)) + data)
+            self._file.flush()
+
+    @classmethod
+    def read(cls, path):
+        """Yield the records of a checkpoint file in the order they were written."""
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(cls.HEADER.size)
+                if len(header) < cls.HEADER.size:
+                    return
+                data = f.read(cls.HEADER.unpack(header)[0])
+                try:
+                    yield pickle.loads(zlib.decompress(data))
+                except (zlib.error, pickle.UnpicklingError, EOFError):
+                    return  # cut off by a crash
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+# ---------- word index for Find & Replace ----------
+class WordIndex:
+    """
+    Inverted index from words (lowercase, without surrounding punctuation)
+    to their token positions in each report. Reports are tokenized once and
+    re-indexed one at a time when they are edited, so finds do not have to
+    scan the corpus.
+    """
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.reports = {}   # report_idx -> (text, token starts, token ends)
+        self.postings = {}  # word -> {report_idx: [token positions]}
+
+    @staticmethod
+    def normalize(token_text):
+        return token_text.strip(string.punctuation).lower()
+
+    def build(self, reports):
+        self.reports.clear()
+        self.postings.clear()
+        for i, doc in enumerate(self.tokenizer.pipe(reports)):
+            self._add(i, doc)
+
+    def _add(self, i, doc):
+        starts = array("l")
+        ends = array("l")
+        postings = self.postings
+        for pos, token in enumerate(doc):
+            token_text = token.text
+            starts.append(token.idx)
+            ends.append(token.idx + len(token_text))
+            word = token_text.strip(string.punctuation).lower()
+            if not word:
+                continue
+            by_report = postings.get(word)
+            if by_report is None:
+                postings[word] = {i: [pos]}
+            elif i in by_report:
+                by_report[i].append(pos)
+            else:
+                by_report[i] = [pos]
+        self.reports[i] = (doc.text, starts, ends)
+
+    def remove(self, i):
+        text, starts, ends = self.reports.pop(i)
+        for start, end in zip(starts, ends):
+            word = self.normalize(text[start:end])
+            reports = self.postings.get(word)
+            if reports is not None and reports.pop(i, None) is not None and not reports:
+                del self.postings[word]
+
+    def update(self, i, text):
+        if i in self.reports:
+            self.remove(i)
+        self._add(i, self.tokenizer(text))
+
+    def find(self, word):
+        """[(report_idx, token position)] of a word, in report order."""
+        reports = self.postings.get(word.lower(), {})
+        return [(i, pos) for i in sorted(reports) for pos in reports[i]]
+
+    def match(self, i, pos, window=5):
+        """
+        (matched_text, context, start_char, end_char) of the word at token
+        position pos, the context being `window` words on each side with the
+        word in brackets.
+        """
+        text, starts, ends = self.reports[i]
+        tokens = lambda a, b: [text[starts[k]:ends[k]] for k in range(a, b)]
+
+        # move left / right until we've collected `window` words
+        left, words = pos, 0
+        while left > 0 and words < window:
+            left -= 1
+            if text[starts[left]:ends[left]].strip(string.punctuation):
+                words += 1
+        right, words = pos, 0
+        while right < len(starts) - 1 and words < window:
+            right += 1
+            if text[starts[right]:ends[right]].strip(string.punctuation):
+                words += 1
+
+        matched_text = text[starts[pos]:ends[pos]]
+        context_tokens = tokens(left, pos) + [f"[{matched_text}]"] + tokens(pos + 1, right + 1)
+        return matched_text, " ".join(context_tokens), starts[pos], ends[pos]
+
+
+# ---------- multi-pattern Find & Replace ----------
+def read_patterns(path):
+    """
+    {pattern: replacement} from a .json object or a two-column .csv / .tsv
+    file (pattern, replacement; a header row is optional).
+    """
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    with open(path, newline="", encoding="utf-8") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        delimiter = "\t" if "\t" in sample else ","
+        rows = [row for row in csv.reader(f, delimiter=delimiter) if row and row[0]]
+    if rows and [c.strip().lower() for c in rows[0][:2]] == ["pattern", "replacement"]:
+        rows = rows[1:]
+    return {row[0]: (row[1] if len(row) > 1 else "") for row in rows}
+
+
+def _embed_regex(pattern, offset, k):
+    """
+    A regex rewritten to keep its meaning as alternative k of a combined
+    expression in which its groups are numbered from offset + 1: numbered
+    backreferences and conditionals are shifted, group names made unique
+    and leading global flags (?i) turned into a scoped group.
+    """
+    flags = re.match(r"\(\?([aiLmsux]+)\)", pattern)
+    if flags:
+        pattern = f"(?{flags.group(1)}:{pattern[flags.end():]})"
+
+    def ref(n):
+        if n + offset > 99:
+            raise re.error(f"too many groups to combine with the other patterns: {pattern}")
+        return str(n + offset)
+
+    out = []
+    i, in_class = 0, False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            digits = re.match(r"[0-7]{3}|[1-9]\d?", pattern[i + 1:i + 4]) if not in_class else None
+            if digits and not (len(digits.group()) == 3 or digits.group().startswith("0")):
+                out.append("\\" + ref(int(digits.group())))  # backreference
+                i += 1 + len(digits.group())
+            else:
+                out.append(pattern[i:i + 2])  # escape, octal or in a class
+                i += 2
+        elif in_class:
+            out.append(c)
+            in_class = c != "]"
+            i += 1
+        elif c == "[":
+            # a leading "]" (after an optional "^") is a literal
+            literal = re.match(r"\[\^?\]?", pattern[i:]).group()
+            out.append(literal)
+            in_class = True
+            i += len(literal)
+        elif pattern.startswith("(?#", i):
+            end = pattern.index(")", i) + 1
+            out.append(pattern[i:end])
+            i = end
+        elif pattern.startswith(("(?P<", "(?P=", "(?("), i):
+            head = 3 if pattern[i + 2] == "(" else 4
+            close = ">" if pattern[i + 3] == "<" else ")"
+            end = pattern.index(close, i + head)
+            name = pattern[i + head:end]
+            out.append(pattern[i:i + head] + (ref(int(name)) if name.isdigit() else f"_{k}_{name}") + close)
+            i = end + 1
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+class MultiPattern:
+    """
+    Many find → replace patterns compiled into one regular expression, so
+    each report is scanned once for all of them. Literal patterns match
+    whole words, ignoring case, like the Find box; the longest wins when
+    several start at the same place. With regex=True the patterns are
+    regular expressions and replacements may use group references (\\1);
+    each keeps its meaning inside the combined expression (see _embed_regex).
+    """
+    def __init__(self, patterns, regex=False, ignore_case=True):
+        flags = re.IGNORECASE if ignore_case else 0
+        items = [(p, r) for p, r in patterns.items() if p]
+        if not regex:
+            items.sort(key=lambda item: len(item[0]), reverse=True)
+            items = [(r"(?<!\w)" + re.escape(p) + r"(?!\w)", r.replace("\\", "\\\\")) for p, r in items]
+
+        self.replacements = [r for _, r in items]
+        self.regexes = [re.compile(p, flags) for p, _ in items]  # raises re.error on bad patterns
+        alternatives = []
+        offset = 0
+        for k, (p, _) in enumerate(items):
+            offset += 1  # the group around each alternative
+            alternatives.append(f"(?P<p{k}>{_embed_regex(p, offset, k) if regex else p})")
+            offset += self.regexes[k].groups
+        self.combined = re.compile("|".join(alternatives), flags)
+
+    def __len__(self):
+        return len(self.regexes)
+
+    def finditer(self, text):
+        """Yield (start, end, replacement) for each match, in one scan of the text."""
+        if not self.regexes:
+            return
+        for m in self.combined.finditer(text):
+            if m.start() == m.end():
+                continue  # ignore empty matches
+            k = int(m.lastgroup[1:])
+            # re-match the pattern on its own so group references in the replacement work
+            own = self.regexes[k].match(text, m.start())
+            yield m.start(), m.end(), own.expand(self.replacements[k])
+
+
+class KeywordMatcher:
+    """
+    Keywords compiled once for flagging and highlighting. Word keywords,
+    single or multi-word ("bad dream"), are matched as lemma sequences on
+    the cached analyses, like spaCy's PhraseMatcher on LEMMA but without
+    needing the parsed Doc; a token matches a lemma directly or after
+    `normalize`. Other keywords ("...", "(?)") are literal strings found
+    in one scan of the text.
+    """
+    def __init__(self, phrases, literals=(), exceptions=(), normalize=None):
+        # phrases: {(lemma, ...): keyword}; the longest phrase wins at a token
+        self.normalize = normalize or (lambda lemma: lemma)
+        self.phrases = {}
+        for lemmas, keyword in sorted(phrases.items(), key=lambda item: len(item[0]), reverse=True):
+            if lemmas and not (len(lemmas) == 1 and lemmas[0] in exceptions):
+                self.phrases.setdefault(lemmas[0], []).append((lemmas, keyword))
+        self.literals = sorted({kw for kw in literals if kw}, key=len, reverse=True)
+        self.literal = re.compile("|".join(map(re.escape, self.literals))) if self.literals else None
+
+    def __bool__(self):
+        return bool(self.phrases or self.literal)
+
+    def matches(self, analysis, text):
+        """(start_char, end_char, keyword) for each hit in a report, in text order."""
+        hits = []
+        if self.phrases:
+            tokens, offsets = analysis["tokens"], analysis["offsets"]
+            forms = [(lemma, self.normalize(lemma)) for lemma in analysis["lemmas"]]
+            for i, (lemma, norm) in enumerate(forms):
+                candidates = self.phrases.get(lemma)
+                others = self.phrases.get(norm) if norm != lemma else None
+                if candidates and others:  # phrases starting with either form, longest first
+                    candidates = sorted(candidates + others, key=lambda c: len(c[0]), reverse=True)
+                candidates = candidates or others
+                if not candidates:
+                    continue
+                for lemmas, keyword in candidates:
+                    end = i + len(lemmas)
+                    if end <= len(forms) and all(
+                        want in forms[j] for j, want in enumerate(lemmas, i)
+                    ):
+                        hits.append((offsets[i], offsets[end - 1] + len(tokens[end - 1]), keyword))
+                        break
+        if self.literal is not None:
+            hits.extend((m.start(), m.end(), m.group()) for m in self.literal.finditer(text))
+        hits.sort()
+        return hits
+
+
+def text_context(text, start, end, window=5):
+    """Up to `window` words before and after a character span, with the span in brackets."""
+    before = text[:start].rsplit(None, window)[-window:] if text[:start].strip() else []
+    after = text[end:].split(None, window)[:window]
+    return " ".join(before + [f"[{text[start:end]}]"] + after)
+
+
+# ---------- spelling suggestions in worker processes ----------
+_worker_spell = None
+
+
+def _init_spell_worker():
+    global _worker_spell
+    _worker_spell = SpellChecker()
+
+
+def _spell_corrections(words):
+    return [(word, _worker_spell.correction(word)) for word in words]
+
+
+class SuggestionWorkers:
+    """
+    Computes spelling corrections in a process pool, one job per report.
+    A feeder thread submits the jobs in order, keeping only a few in flight
+    so that prioritize() can move the report on screen to the front.
+    Results arrive on the thread-safe `results` queue as
+    (report_idx, [(word, suggestion)]), followed by None when all are done.
+    """
+    def __init__(self, jobs, max_workers=None):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.results = queue.Queue()
+        self.failed = None  # exception if the pool broke, e.g. could not start
+        self._jobs = OrderedDict(jobs)  # report_idx -> words, in report order
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._feed, daemon=True)
+        self._thread.start()
+
+    def prioritize(self, report_idx):
+        with self._cond:
+            if report_idx in self._jobs:
+                self._jobs.move_to_end(report_idx, last=False)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._jobs.clear()
+
+    def _feed(self):
+        in_flight = threading.BoundedSemaphore(self.max_workers * 2)
+
+        def done(future, report_idx):
+            in_flight.release()
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed = future.exception()
+                self.stop()
+            else:
+                self.results.put((report_idx, future.result()))
+
+        # spawned, not forked: forking while Tk and the model loading threads
+        # hold locks can deadlock the workers
+        pool = ProcessPoolExecutor(
+            self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_spell_worker,
+        )
+        try:
+            while True:
+                in_flight.acquire()
+                with self._cond:
+                    if self._stopped or not self._jobs:
+                        in_flight.release()
+                        break
+                    report_idx, words = self._jobs.popitem(last=False)
+                future = pool.submit(_spell_corrections, words)
+                future.add_done_callback(lambda f, idx=report_idx: done(f, idx))
+        except Exception as e:  # e.g. BrokenProcessPool
+            self.failed = e
+        finally:
+            pool.shutdown(wait=True, cancel_futures=self._stopped)
+            self.results.put(None)
+
+
+# ---------- background tasks ----------
+class BackgroundTask:
+    """
+    Runs a generator function in a worker thread so that the Tk mainloop
+    never waits on parsing or lookups. Every item it yields is put on the
+    thread-safe `results` queue, followed by DONE once it has finished,
+    failed (see `error`) or been cancelled. cancel() takes effect after the
+    item being computed.
+    """
+    DONE = object()
+
+    def __init__(self, produce, *args):
+        self.results = queue.Queue()
+        self.error = None
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(produce, args), daemon=True)
+        self._thread.start()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def _run(self, produce, args):
+        try:
+            for item in produce(*args):
+                if self._cancelled.is_set():
+                    break
+                self.results.put(item)
+        except Exception as e:  # shown by the GUI on the Tk thread
+            self.error = e
+        finally:
+            self.results.put(self.DONE)
+
+
+# ---------- virtualized match list ----------
+class MatchList:
+    """
+    Scrollable list of checkable matches for tens of thousands of rows.
+    Widgets exist only for the rows that fit in the window and are reused
+    for other matches while scrolling. The selection is kept in a bytearray
+    and the (editable) suggestions in a list, so Select All / None are one
+    bulk assignment and a match costs no widgets.
+    A row is (report_idx or None, context, suggestion or None, item);
+    `item` is handed back by selected_rows().
+    """
+    def __init__(self, parent):
+        self.frame = tk.Frame(parent)
+        self.body = tk.Frame(self.frame, height=120)
+        self.body.grid_propagate(False)  # the window sets the size, not the rows
+        self.body.grid_columnconfigure(0, weight=1)
+        self.scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=self.on_scroll)
+        self.body.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.empty_label = tk.Label(self.body, fg="red")
+
+        self.reports = array("l")  # report index of each row, -1 for none
+        self.contexts = []
+        self.values = []           # suggestion of each row, None if not editable
+        self.items = []
+        self.positions = {}        # id(item) -> row
+        self.selected = bytearray()
+        self.top = 0               # first visible row
+        self.slots = []            # reused row widgets
+        self.row_height = None
+        self._refreshing = False
+
+        self.body.bind("<Configure>", lambda e: self.refresh())
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.frame.bind_all(sequence, self._on_wheel, add="+")
+
+    def __len__(self):
+        return len(self.items)
+
+    # ----- rows -----
+    def clear(self, empty_text=""):
+        self.reports = array("l")
+        self.contexts = []
+        self.values = []
+        self.items = []
+        self.positions = {}
+        self.selected = bytearray()
+        self.top = 0
+        self.empty_label.config(text=empty_text)
+        self.refresh()
+
+    def add_rows(self, rows):
+        for report_idx, context, value, item in rows:
+            self.positions[id(item)] = len(self.items)
+            self.reports.append(-1 if report_idx is None else report_idx)
+            self.contexts.append(context)
+            self.values.append(value)
+            self.items.append(item)
+        self.selected.extend(b"\x01" * (len(self.items) - len(self.selected)))  # default: selected
+        self.refresh()
+
+    def update_context(self, item, context):
+        """Change the context shown for an item's row, if it is in the list."""
+        k = self.positions.get(id(item))
+        if k is not None:
+            self.contexts[k] = context
+            if self.top <= k < self.top + len(self.slots):
+                self.refresh()
+
+    def select_all(self, value=True):
+        self.selected[:] = (b"\x01" if value else b"\x00") * len(self.selected)
+        self.refresh()
+
+    def selected_rows(self):
+        """[(item, suggestion)] of the checked rows."""
+        return [(self.items[k], self.values[k]) for k in range(len(self.items)) if self.selected[k]]
+
+    def keep_unselected(self):
+        """Drop the checked rows, e.g. once they have been applied."""
+        keep = [k for k in range(len(self.items)) if not self.selected[k]]
+        rows = [(self.reports[k], self.contexts[k], self.values[k], self.items[k]) for k in keep]
+        self.clear(self.empty_label.cget("text"))
+        self.add_rows(rows)
+        self.select_all(False)  # they were unchecked
+
+    # ----- rendering -----
+    def _make_slot(self):
+        j = len(self.slots)
+        row = tk.Frame(self.body)
+        check_var = tk.BooleanVar()
+        tk.Checkbutton(row, variable=check_var, command=lambda: self._toggle(j)).pack(side="left")
+        report_label = tk.Label(row, fg="blue", width=10, anchor="w")
+        report_label.pack(side="left")
+        context_label = tk.Label(row, anchor="w", justify="left")
+        context_label.pack(side="left", padx=5)
+        entry_var = tk.StringVar()
+        entry_var.trace_add("write", lambda *_: self._edited(j))
+        entry = tk.Entry(row, width=20, textvariable=entry_var)
+        slot = (row, check_var, report_label, context_label, entry, entry_var)
+        self.slots.append(slot)
+        return slot
+
+    def refresh(self):
+        """Show the rows from self.top on in the visible row widgets."""
+        if self.row_height is None:
+            row, *_, entry, _ = self._make_slot()
+            entry.pack(side="left", padx=5)
+            row.grid(row=0, column=0, sticky="ew")
+            self.body.update_idletasks()
+            self.row_height = max(row.winfo_reqheight(), 1)
+        visible = max(1, self.body.winfo_height() // self.row_height)
+        while len(self.slots) < visible:
+            self._make_slot()
+
+        n = len(self.items)
+        self.top = max(0, min(self.top, n - visible))
+        self._refreshing = True
+        for j, (row, check_var, report_label, context_label, entry, entry_var) in enumerate(self.slots):
+            k = self.top + j
+            if j >= visible or k >= n:
+                row.grid_remove()
+                continue
+            check_var.set(bool(self.selected[k]))
+            new_report = k == self.top or self.reports[k] != self.reports[k - 1]
+            show_report = new_report and self.reports[k] >= 0
+            report_label.config(text=f"Report {self.reports[k] + 1}:" if show_report else "")
+            context_label.config(text=self.contexts[k])
+            if self.values[k] is None:
+                entry.pack_forget()
+            else:
+                entry_var.set(self.values[k])
+                entry.pack(side="left", padx=5)
+            row.grid(row=j, column=0, sticky="ew")
+        self._refreshing = False
+
+        if n == 0 and self.empty_label.cget("text"):
+            self.empty_label.grid(row=0, column=0, sticky="w")
+        else:
+            self.empty_label.grid_remove()
+        self.scrollbar.set(self.top / n if n else 0.0, min(1.0, (self.top + visible) / n) if n else 1.0)
+
+    def _toggle(self, j):
+        self.selected[self.top + j] = self.slots[j][1].get()
+
+    def _edited(self, j):
+        if not self._refreshing and self.top + j < len(self.items):
+            self.values[self.top + j] = self.slots[j][5].get()
+
+    # ----- scrolling -----
+    def on_scroll(self, action, amount, unit=None):
+        visible = max(1, self.body.winfo_height() // (self.row_height or 1))
+        if action == "moveto":
+            self.top = int(float(amount) * len(self.items))
+        elif unit == "pages":
+            self.top += int(amount) * visible
+        else:
+            self.top += int(amount)
+        self.refresh()
+
+    def _on_wheel(self, event):
+        if not str(event.widget).startswith(str(self.frame)):
+            return  # the pointer is not over the list
+        if event.num == 4:  # Linux
+            step = -1
+        elif event.num == 5:
+            step = 1
+        else:  # Windows / macOS
+            step = -1 if event.delta > 0 else 1
+        self.on_scroll("scroll", step * 3, "units")
+
+
+# ---------- spaCy model ----------
+MODELS = {
+    "sm": "en_core_web_sm",
+    "md": "en_core_web_md",
+    "lg": "en_core_web_lg",
+    "trf": "en_core_web_trf",
+}
+
+# components no step uses, never loaded
+UNUSED_PIPES = ["parser", "senter", "textcat", "textcat_multilabel"]
+
+# components a task needs; shared tok2vec / transformer layers are always kept
+TASK_PIPES = {
+    "lemmas": {"tagger", "morphologizer", "attribute_ruler", "lemmatizer"},
+    "pos": {"tagger", "morphologizer", "attribute_ruler"},
+}
+
+
+# occupations a famous name is replaced with, found anywhere in a noun phrase
+OCCUPATION_KEYWORDS = frozenset({
+    # Arts & Entertainment
+    "actor", "actress", "singer", "musician", "songwriter", "composer",
+    "dancer", "director", "producer", "painter", "artist", "poet",
+    "writer", "author", "novelist", "playwright", "comedian", "performer",
+    "entertainer", "cartoonist", "illustrator", "editor",
+
+    # Media & Broadcasting
+    "host", "presenter", "broadcaster", "journalist", "anchor",
+    "reporter", "talk show host",
+
+    # Academia & Philosophy
+    "philosopher", "scientist", "physicist", "chemist", "mathematician",
+    "biologist", "historian", "professor", "researcher", "academic",
+    "scholar",
+
+    # Politics & Leadership
+    "president", "prime minister", "chancellor", "king", "queen",
+    "emperor", "politician", "diplomat", "senator", "mayor", "governor",
+
+    # Sports
+    "athlete", "footballer", "basketball player", "soccer player",
+    "swimmer", "runner", "coach", "manager", "olympian",
+
+    # Business & Miscellaneous Famous Roles
+    "entrepreneur", "inventor", "activist", "philanthropist", "chef",
+    "designer", "architect", "lawyer", "judge",
+})
+
+# place types, first match wins, and the words of a description that give them
+PLACE_TYPES = (
+    ("city", ("city", "cities", "megacity", "megacities", "metropolis", "urban area", "municipality")),
+    ("town", ("town", "towns", "village", "villages")),
+    ("country", ("country", "nation")),
+    ("state", ("state", "states", "province", "provinces", "canton", "cantons", "governorate")),
+    ("river", ("river", "rivers", "stream", "creek")),
+    ("lake", ("lake", "lakes", "reservoir", "pond")),
+    ("ocean", ("sea", "seas", "ocean", "oceans", "coast", "costal", "gulf", "bay")),
+    ("landmark", ("monument", "building", "structure",
+                  "landmark", "tower", "statue", "temple",
+                  "cathedral", "church", "mosque", "castle", "fort")),
+)
+
+
+def _keyword_pattern(keywords, overlapping=False):
+    """Keywords as one regular expression, longest first; overlapping finds one at every position."""
+    alternatives = "|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+    return re.compile(f"(?=({alternatives}))" if overlapping else alternatives)
+
+
+OCCUPATION_PATTERN = _keyword_pattern(OCCUPATION_KEYWORDS)
+PLACE_PATTERN = _keyword_pattern([kw for _, keywords in PLACE_TYPES for kw in keywords], overlapping=True)
+PLACE_TYPE_OF = {kw: rank for rank, (_, keywords) in enumerate(PLACE_TYPES) for kw in keywords}
+
+
+class EntityClassifier:
+    """
+    Occupations and place types from Wikidata descriptions, many at once.
+    A place type takes one scan with PLACE_PATTERN. An occupation is the
+    first noun phrase containing an occupation keyword, so only the
+    descriptions that contain a keyword at all are parsed, each distinct
+    one once and all in one batch through parse_many(texts) -> docs.
+    """
+    def __init__(self, parse_many, maxsize=100000):
+        self.parse_many = parse_many
+        self.known = LRUDict(maxsize)  # description -> occupation phrase or None
+
+    @staticmethod
+    def place(description):
+        """Place type like 'city', 'river', 'country', 'landmark', or 'place'."""
+        ranks = [PLACE_TYPE_OF[m.group(1)] for m in PLACE_PATTERN.finditer(description or "")]
+        return PLACE_TYPES[min(ranks)][0] if ranks else "place"
+
+    def places(self, descriptions):
+        """{description: place type}"""
+        return {description: self.place(description) for description in set(descriptions)}
+
+    @staticmethod
+    def occupation_phrase(doc):
+        """First run of consecutive nouns that contains an occupation keyword, or None."""
+        phrases = []
+        current_phrase = []
+        for token in doc:
+            if token.pos_ == "NOUN":
+                current_phrase.append(token.text.lower())
+            elif current_phrase:
+                phrases.append(" ".join(current_phrase))
+                current_phrase = []
+        if current_phrase:
+            phrases.append(" ".join(current_phrase))
+
+        for phrase in phrases:
+            if OCCUPATION_PATTERN.search(phrase):
+                return phrase
+        return None
+
+    def occupations(self, descriptions):
+        """{description: occupation phrase or None}"""
+        results = {}
+        todo = {}  # description -> text to parse
+        for description in descriptions:
+            if description in results or description in todo:
+                continue
+            known = self.known.get(description, LookupCache.MISSING)
+            if known is not LookupCache.MISSING:
+                results[description] = known
+            elif not description or "given name" in description or "family name" in description:
+                results[description] = None  # generic names → first initial
+            else:
+                # without parentheses and after the first comma
+                text = description.split("(")[0].split(",")[0]
+                if OCCUPATION_PATTERN.search(text):
+                    todo[description] = text
+                else:
+                    results[description] = None
+
+        if todo:
+            for description, doc in zip(todo, self.parse_many(list(todo.values()))):
+                results[description] = self.known[description] = self.occupation_phrase(doc)
+        return results
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB, or None if unknown."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+# an entity found in a report: token span (start, end) and character span
+Entity = namedtuple("Entity", "text label start end start_char end_char")
+
+
 # gui.cleaned_reports output reports
 class DreamCruncher:
-    def __init__(self, reports, keywords, exceptions=None):
-        
-        try:
-            self.nlp = spacy.load("en_core_web_lg")
-        except OSError:
-            print("spaCy model en_core_web_lg not installed, downloading")
-            subprocess.check_call([sys.executable, "-m", "spacy", "download", "en_core_web_lg"])
-            self.nlp = spacy.load("en_core_web_lg")
+    def __init__(self, reports, keywords, exceptions=None, doc_cache_size=2048,
+                 batch_size=64, n_process=1, lookup_cache_path=None,
+                 lookup_ttl=30 * 24 * 3600, wikidata_url=None, lookup_workers=8,
+                 gui=True, model="lg", preload_model=None, correction_cache_size=100000,
+                 persist_corrections=False, spell_workers=0, checkpoint_path=None,
+                 checkpoint_interval=30, resume=False, gazetteer_path=None,
+                 analysis_cache_size=100000, overwrite_checkpoint=False):
+
+        # The spaCy model loads in a background thread while the GUI comes up;
+        # self.nlp waits for it. Headless runs only load it when a step needs it.
+        self.startup_stats = {}
+        self._started = time.perf_counter()
+        self.model_name = MODELS.get(model, model)
+        self._nlp = None
+        self._nlp_error = None
+        self._nlp_lock = threading.Lock()
+        self._model_lock = threading.RLock()  # the pipeline runs one caller at a time (see run_model)
+        self._nlp_thread = threading.Thread(target=self.load_model, daemon=True)
+        preload = gui if preload_model is None else preload_model
+        if preload:
+            self._nlp_thread.start()
+
+        # tokenizer only, for finding words without a model
+        self.tokenizer = spacy.blank("en").tokenizer
 
         self.spell = SpellChecker()
+
+        # parsed reports, shared by all steps (see DocCache)
+        self.doc_cache = DocCache(self.run_model, maxsize=doc_cache_size)
+
+        # per-report entities, lemmas and token offsets (see analyze_reports),
+        # for at most analysis_cache_size distinct texts
+        self.analyses = LRUDict(analysis_cache_size)
+        self.keyword_hits_cache = LRUDict(analysis_cache_size)  # text key -> keyword hits (see keyword_hits)
+        self.batch_size = batch_size
+        self.n_process = n_process
+
+        # resolved Wikidata lookups, kept across sessions (see LookupCache)
+        self.lookup_cache = LookupCache(lookup_cache_path, ttl=lookup_ttl)
+        self.wikidata = WikidataClient(wikidata_url, max_workers=lookup_workers)
+        # occupations and place types from descriptions (see EntityClassifier)
+        self.classifier = EntityClassifier(
+            lambda texts: self.pipe_model(texts, batch_size=self.batch_size, disable=self.disabled_pipes("pos"))
+        )
+        # local Wikidata extract that replaces the network lookups (see Gazetteer)
+        self.gazetteer = Gazetteer(gazetteer_path) if gazetteer_path else None
+
+        # memoized spelling corrections for the whole corpus (see correction),
+        # optionally kept next to the lookup cache
+        self.corrections = OrderedDict()
+        self.correction_cache_size = correction_cache_size
+        self._corrections_lock = threading.Lock()
+        self.correction_store = (
+            LookupCache(self.lookup_cache.path, ttl=None, maxsize=0) if persist_corrections else None
+        )
+        # word -> misspelled?, checked once per word while it is among the most recent
+        self.spelling_status = LRUDict(correction_cache_size)
+        # processes for suggestions: 0 = none (a thread), None = one per core but one;
+        # processes need the calling script's code under `if __name__ == "__main__":`
+        self.spell_workers = spell_workers
+        self.suggestion_workers = None
+        self.session_log = None  # see SessionLog, opened below
         
-        if hasattr(reports, "tolist"):  # e.g. a Pandas Series
-            reports = reports.tolist()
-    
-    
-        self.original_reports = list(reports)
-        self.cleaned_reports = copy.deepcopy(reports)
-        self.keywords = {
-            (self.nlp(kw)[0].lemma_.lower() if kw.isalpha() else kw)
-            for kw in keywords
-            if kw
-        }
+        self.load_reports(reports)
+        self.raw_keywords = [kw for kw in keywords if kw]
+        self._keyword_matcher = None  # lemmatized on first use, see keyword_matcher
         self.exceptions = {w.lower() for w in (exceptions or [])}
-        
-        
-        # track changes
-        self.changes = {i: [] for i in range(len(self.cleaned_reports))}
     
         # State variables
         self.step = 0  # Step 0: Find/Replace
         self.spellcheck_indices = []
         self.current_index = 0
         self.flagged_indices = []
-        self.replace_map = {}
-        self.match_vars = []  # store (report_index, kw, tk.BooleanVar)
-    
-        # --- GUI setup ---
+        self.tracked_changes = None
+        self.task = None  # BackgroundTask building the current step's matches
+
+        # checkpoints of the edit journal and step state (see SessionLog, resume)
+        self.checkpoint_interval = checkpoint_interval
+        self._resume_state = None
+        self._last_state = None
+        if checkpoint_path is not None:
+            if resume:
+                self.replay_checkpoint(checkpoint_path)
+            self.session_log = SessionLog(checkpoint_path, append=resume, overwrite=overwrite_checkpoint)
+            if not resume:
+                self.session_log.append("session", {
+                    "reports": self.original_reports,
+                    "keywords": self.raw_keywords,
+                    "exceptions": sorted(self.exceptions),
+                })
+
+        if gui:
+            self.build_gui()
+            if self._resume_state is not None:
+                self.root.after_idle(self.resume_step)
+            # Start mainloop
+            self.root.mainloop()
+            # the window is closed: hand the cleaned reports back as a plain list
+            self.cleaned_reports = list(self.cleaned_reports)
+
+    # ---------- checkpoints ----------
+    @classmethod
+    def resume(cls, path, gui=True, **kwargs):
+        """
+        Continue a session from its checkpoint file (see checkpoint_path).
+        The reports, edits and cached analyses are restored without
+        re-running the NLP passes and the GUI opens at the step and report
+        where it was left. Further progress is added to the same file.
+        """
+        records = SessionLog.read(path)
+        session = next(records)[1]
+        records.close()
+        return cls(session["reports"], session["keywords"], session["exceptions"], gui=gui,
+                   checkpoint_path=path, resume=True, **kwargs)
+
+    def replay_checkpoint(self, path):
+        """Redo the edits of a checkpoint file and restore its analyses and last step state."""
+        for record in SessionLog.read(path):
+            if record[0] == "edit":
+                _, idx, replacements, change_type = record
+                self.documents[idx].replace(replacements, change_type)
+            elif record[0] == "analyses":
+                for key, analysis in record[1].items():
+                    analysis["ents"] = [Entity(*ent) for ent in analysis["ents"]]
+                    self.analyses[key] = analysis
+            elif record[0] == "state":
+                self._resume_state = record[1]
+        self.count_texts()
+
+    def checkpoint_state(self):
+        """Add the step, position and list selection to the checkpoint if they changed."""
+        if self.session_log is None or not hasattr(self, "match_list"):
+            return  # headless runs have no review state
+        state = {
+            "step": self.step,
+            "current_index": self.current_index,
+            "grouped": self.group_var.get(),
+            "selected": bytes(self.match_list.selected),
+            "values": list(self.match_list.values),
+        }
+        if state != self._last_state:
+            self.session_log.append("state", state)
+            self._last_state = state
+
+    def poll_checkpoint(self):
+        self.checkpoint_state()
+        self.root.after(int(self.checkpoint_interval * 1000), self.poll_checkpoint)
+
+    def close_checkpoint(self):
+        if self.session_log is not None:
+            self.checkpoint_state()
+            self.session_log.close()
+            self.session_log = None
+
+    def resume_step(self):
+        """Go back to the step and report of the checkpoint (see replay_checkpoint)."""
+        state = self._resume_state
+        self.group_var.set(state["grouped"])
+        if state["step"] == 1:
+            self.start_name_step()
+        elif state["step"] == 2:
+            self.start_place_step()
+        elif state["step"] == 3:
+            self._resume_state = None
+            self.start_spellcheck()
+            if self.step == 3 and state["current_index"] < len(self.spellcheck_indices):
+                self.current_index = state["current_index"]
+                self.load_report()
+        elif state["step"] == 4:
+            self.start_keyword_step()  # the report is restored once it is flagged again
+        else:
+            self._resume_state = None
+
+    def restore_selection(self):
+        """Checkbox states and edited suggestions of a resumed name or place list."""
+        state = self._resume_state
+        if state is None or state["step"] != self.step:
+            return
+        self._resume_state = None
+        if len(state["selected"]) == len(self.match_list):
+            self.match_list.selected[:] = state["selected"]
+            self.match_list.values[:] = state["values"]
+            self.match_list.refresh()
+
+    # ---------- spaCy model ----------
+    def load_model(self):
+        start = time.perf_counter()
+        try:
+            try:
+                nlp = spacy.load(self.model_name, exclude=UNUSED_PIPES)
+            except OSError:
+                print(f"spaCy model {self.model_name} not installed, downloading")
+                subprocess.check_call([sys.executable, "-m", "spacy", "download", self.model_name])
+                nlp = spacy.load(self.model_name, exclude=UNUSED_PIPES)
+        except BaseException as e:  # re-raised by self.nlp on the calling thread
+            self._nlp_error = e
+            return
+
+        self._nlp = nlp
+        self.startup_stats["model_load_s"] = time.perf_counter() - start
+        self.startup_stats["model_ready_s"] = time.perf_counter() - self._started
+        self.startup_stats["peak_memory_mb"] = peak_memory_mb()
+        memory = self.startup_stats["peak_memory_mb"]
+        print(
+            f"Loaded {self.model_name} in {self.startup_stats['model_load_s']:.1f}s"
+            + (f", peak resident memory {memory:.0f} MB" if memory else "")
+        )
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            with self._nlp_lock:
+                if self._nlp is None and self._nlp_error is None:
+                    if not self._nlp_thread.is_alive() and self._nlp_thread.ident is None:
+                        self._nlp_thread.start()
+                    self._nlp_thread.join()
+            if self._nlp_error is not None:
+                raise self._nlp_error
+        return self._nlp
+
+    @nlp.setter
+    def nlp(self, nlp):
+        self._nlp = nlp
+
+    def disabled_pipes(self, task):
+        """Loaded components that a task ("lemmas", "pos") does not need."""
+        keep = TASK_PIPES[task] | {"tok2vec", "transformer"}
+        return [name for name in self.nlp.pipe_names if name not in keep]
+
+    def run_model(self, text, **kwargs):
+        """
+        self.nlp(text), one caller at a time: the GUI and the background
+        tasks share one pipeline, which is not made for concurrent use.
+        """
+        nlp = self.nlp  # wait for the model outside the lock
+        with self._model_lock:
+            return nlp(text, **kwargs)
+
+    def pipe_model(self, texts, **kwargs):
+        """
+        self.nlp.pipe, holding the model lock only while a batch is parsed,
+        so that the GUI can parse a report between two batches.
+        """
+        docs = self.nlp.pipe(texts, **kwargs)
+        while True:
+            with self._model_lock:
+                doc = next(docs, None)
+            if doc is None:
+                return
+            yield doc
+
+    @property
+    def keyword_matcher(self):
+        """The keywords compiled into a KeywordMatcher, built once."""
+        if self._keyword_matcher is None:
+            disable = self.disabled_pipes("lemmas")
+            phrases, literals = {}, []
+            for kw in self.raw_keywords:
+                words = kw.split()
+                if words and all(w.isalpha() for w in words):
+                    lemmas = tuple(t.lemma_.lower() for t in self.run_model(kw, disable=disable))
+                    phrases.setdefault(lemmas, kw)
+                else:
+                    literals.append(kw)
+            self._keyword_matcher = KeywordMatcher(phrases, literals, self.exceptions, self.normalize_word)
+        return self._keyword_matcher
+
+    @property
+    def keywords(self):
+        """Keyword lemmas (multi-word ones joined by spaces) and literal keywords."""
+        matcher = self.keyword_matcher
+        lemmas = {" ".join(lemmas) for candidates in matcher.phrases.values() for lemmas, _ in candidates}
+        return lemmas | set(matcher.literals)
+
+    def load_reports(self, reports):
+        """(Re)start on a new set of reports, keeping the model and lookup caches."""
+        if hasattr(reports, "tolist"):  # e.g. a Pandas Series
+            reports = reports.tolist()
+
+        self.original_reports = list(reports)
+        # edits are kept per report as a piece table (see ReportDocument)
+        self.documents = [ReportDocument(report) for report in self.original_reports]
+        # cleaned_reports[i] = text is tracked as a "manual" change
+        self.cleaned_reports = CleanedReports(
+            self.documents, lambda idx, text: self.set_report(idx, text, "manual")
+        )
+        # the journals grow in place, so this stays current
+        self._changes = {i: doc.journal for i, doc in enumerate(self.documents)}
+        self.count_texts()
+        self.analyses.clear()
+        self.keyword_hits_cache.clear()
+        # detector results per step, redone for edited reports only (see iter_detections)
+        self.detections = {
+            name: ReportResults(len(self.documents)) for name in ("names", "places", "keywords")
+        }
+        self.word_index = None  # built on the first find
+        self.misspelled_index = None  # built when the spellcheck step starts
+
+    def count_texts(self):
+        """Count the reports per text, so cached parses are kept while any report still has that text."""
+        self.text_refs = Counter(DocCache.key(report) for report in self.cleaned_reports)
+
+    @property
+    def changes(self):
+        """Tracked changes per report: {report_idx: [(start, end, old_text, new_text, change_type)]}."""
+        return self._changes
+
+    # ---------- headless batch processing ----------
+    STEPS = ("replace", "names", "places", "spellcheck", "keywords")
+
+    @classmethod
+    def run_batch(cls, reports, keywords=(), exceptions=None, steps=STEPS,
+                  replacements=None, auto_accept=True, regex=False, wide_changes=True, **kwargs):
+        """
+        Run the cleaning steps without a GUI, e.g. in a nightly job.
+        Returns (cleaned_reports, tracked_changes). See run_steps.
+        """
+        cruncher = cls(reports, keywords, exceptions, gui=False, **kwargs)
+        return cruncher.run_steps(steps, replacements=replacements, auto_accept=auto_accept, regex=regex,
+                                  wide_changes=wide_changes)
+
+    def run_steps(self, steps=STEPS, replacements=None, auto_accept=True, regex=False, wide_changes=True):
+        """
+        Headless version of the GUI steps, in the GUI's order:
+          "replace"    - find & replace every {pattern: replacement} in `replacements`
+                         (a dict or pattern file, regular expressions if regex=True)
+          "names"      - anonymize names with their suggestion
+          "places"     - replace places with their suggestion
+          "spellcheck" - apply the spellchecker's corrections
+          "keywords"   - flag reports containing keywords (never edits)
+        With auto_accept=False nothing is changed; the matches are only
+        collected (name_matches, place_matches, spellcheck_indices) so that
+        just those reports need a manual review. flagged_indices is always
+        filled when "keywords" runs.
+        Returns (cleaned_reports, tracked_changes); with wide_changes=False
+        tracked_changes has start/end offsets instead of both full reports
+        in every row (see ChangeTable).
+        """
+        unknown = set(steps) - set(self.STEPS)
+        if unknown:
+            raise ValueError(f"Unknown steps: {sorted(unknown)}")
+
+        if "replace" in steps and replacements:
+            if not isinstance(replacements, MultiPattern):
+                if not isinstance(replacements, dict):
+                    replacements = read_patterns(replacements)
+                replacements = MultiPattern(replacements, regex=regex)
+            matches = self.find_patterns(replacements)
+            if auto_accept:
+                self.replace_matches(matches)
+
+        if "names" in steps:
+            self.name_matches = self.get_name_matches()
+            if auto_accept:
+                self.apply_name_matches(self.name_matches)
+
+        if "places" in steps:
+            self.place_matches = self.get_place_matches()
+            if auto_accept:
+                self.apply_place_matches(self.place_matches)
+
+        if "spellcheck" in steps:
+            self.spellcheck_indices = self.get_spellcheck_indices()
+            if auto_accept:
+                if self.start_suggestion_workers(self.spellcheck_indices, background=False) is not None:
+                    while self.collect_suggestions(block=True):
+                        pass
+                for idx in self.spellcheck_indices:
+                    self.apply_replacements(idx, self.spelling_edits(self.cleaned_reports[idx]), "spellcheck")
+
+        if "keywords" in steps:
+            self.flagged_indices = self.get_flagged_indices()
+
+        self.tracked_changes = self.changes_to_dataframe(
+            self.original_reports,
+            self.cleaned_reports,
+            self.changes,
+            wide=wide_changes
+        )
+        return list(self.cleaned_reports), self.tracked_changes
+
+    @classmethod
+    def run_stream(cls, source, output, keywords=(), exceptions=None, steps=STEPS,
+                   replacements=None, changes_output=None, chunk_size=1000,
+                   column="report", regex=False, **kwargs):
+        """
+        Headless processing of corpora larger than memory. Reports are read
+        from `source` (an iterable or a .csv/.jsonl/.parquet path, see
+        iter_report_chunks) and run through run_steps in chunks of
+        chunk_size. Each chunk's cleaned reports are appended to `output`
+        (report_idx, cleaned_report and, with the keyword step, flagged) and
+        its tracked changes to `changes_output` (report_idx, change_type,
+        start, end, old_text, new_text, context; the reports themselves are
+        in `source` and `output`), so peak memory only depends on
+        chunk_size. Returns the number of reports processed.
+        """
+        cruncher = cls([], keywords, exceptions, gui=False, **kwargs)
+        if replacements and not isinstance(replacements, dict):
+            replacements = read_patterns(replacements)
+        if replacements:
+            replacements = MultiPattern(replacements, regex=regex)  # compiled once for all chunks
+        writer = ChunkWriter(output)
+        changes_writer = ChunkWriter(changes_output) if changes_output else None
+
+        offset = 0
+        try:
+            for chunk in iter_report_chunks(source, chunk_size, column):
+                cruncher.load_reports(chunk)
+                cleaned, tracked_changes = cruncher.run_steps(steps, replacements=replacements, wide_changes=False)
+
+                out = pd.DataFrame({
+                    "report_idx": range(offset, offset + len(cleaned)),
+                    "cleaned_report": cleaned,
+                })
+                if "keywords" in steps:
+                    out["flagged"] = out.index.isin(cruncher.flagged_indices)
+                writer.write(out)
+
+                if changes_writer is not None and len(tracked_changes):
+                    tracked_changes["report_idx"] += offset
+                    changes_writer.write(tracked_changes)
+                offset += len(cleaned)
+        finally:
+            writer.close()
+            if changes_writer is not None:
+                changes_writer.close()
+        return offset
+
+    # ---------- GUI ----------
+    def build_gui(self):
         self.root = tk.Tk()
         self.root.title("Dream Reports Cleaner")
         
@@ -96,6 +2247,12 @@ class DreamCruncher:
     
         replace_btn = tk.Button(input_frame, text="Replace", command=self.replace_word_step0)
         replace_btn.pack(side=tk.LEFT, padx=2)
+
+        # many patterns at once, loaded from a file
+        self.patterns = None
+        self.regex_var = tk.BooleanVar(value=False)
+        tk.Button(input_frame, text="Load Patterns...", command=self.load_patterns_step0).pack(side=tk.LEFT, padx=(10, 2))
+        tk.Checkbutton(input_frame, text="Regex", variable=self.regex_var).pack(side=tk.LEFT)
     
         # --- Select All / Select None buttons ---
         sel_frame = tk.Frame(self.root)
@@ -103,25 +2260,17 @@ class DreamCruncher:
         tk.Button(sel_frame, text="Select All", command=self.select_all_current).pack(side=tk.LEFT, padx=2)
         tk.Button(sel_frame, text="Select None", command=self.deselect_all_current).pack(side=tk.LEFT, padx=2)
 
+        # names and places: one row per distinct entity instead of per occurrence
+        self.group_var = tk.BooleanVar(value=True)
+        self.entity_groups = {}
+        tk.Checkbutton(
+            sel_frame, text="Group by entity", variable=self.group_var, command=self.regroup_entities
+        ).pack(side=tk.LEFT, padx=(10, 2))
 
-        # --- Step 0: Scrollable checkbox frame ---
-        container = tk.Frame(self.root)
-        container.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
-    
-        canvas = tk.Canvas(container, height=120)
-        scrollbar = tk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        self.context_area_frame = tk.Frame(canvas)
-    
-        self.context_area_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-    
-        canvas.create_window((0, 0), window=self.context_area_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-    
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+
+        # --- Steps 0-2: scrollable checkbox list (see MatchList) ---
+        self.match_list = MatchList(self.root)
+        self.match_list.frame.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
         
         
         # apply name replacement button position
@@ -183,44 +2332,374 @@ class DreamCruncher:
         
         # Bind the close event to your save handler
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
-    
-        # Start mainloop
-        self.root.mainloop()
+
+        self.startup_stats["gui_ready_s"] = time.perf_counter() - self._started
+        self.poll_model_loading()
+        if self.session_log is not None:
+            self.root.after(int(self.checkpoint_interval * 1000), self.poll_checkpoint)
+
+    def poll_model_loading(self):
+        # show in the title that the language model is still loading
+        loading = self._nlp is None and self._nlp_thread.is_alive()
+        if self.step == 0:
+            self.root.title("Dream Reports Cleaner" + (" (loading language model...)" if loading else ""))
+        if loading:
+            self.root.after(250, self.poll_model_loading)
+
+    # ---------- background tasks ----------
+    def start_task(self, produce, on_items, on_done, title):
+        """
+        Run produce, a generator of ((reports done, total), items), in a
+        BackgroundTask instead of on the Tk thread. The items are handed to
+        on_items as they arrive, the progress is shown in the window title
+        and on_done is called at the end. Replaces the running task.
+        """
+        self.cancel_task()
+        self.task = BackgroundTask(produce)
+        self.poll_task(self.task, on_items, on_done, title)
+
+    def poll_task(self, task, on_items, on_done, title):
+        if task is not self.task:
+            return  # cancelled
+        while True:
+            try:
+                item = task.results.get_nowait()
+            except queue.Empty:
+                self.root.after(100, self.poll_task, task, on_items, on_done, title)
+                return
+
+            if item is BackgroundTask.DONE:
+                self.task = None
+                self.root.title(title)
+                if task.error is not None:
+                    messagebox.showerror("Dream Reports Cleaner", f"Processing the reports failed:\n{task.error}")
+                on_done()
+                return
+
+            (done, total), items = item
+            self.root.title(f"{title} (processing reports {done}/{total}...)")
+            on_items(items)
+
+    def cancel_task(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
         
         
         
+    # ---------- parsing and editing reports ----------
+    def parse(self, text):
+        """Parse a report through the shared Doc cache."""
+        return self.doc_cache(text)
+
+    def set_report(self, idx, new_text, change_type):
+        """
+        Replace a whole cleaned report, e.g. after editing it in the text
+        panel. Only the words that differ are edited and tracked, one
+        change each (see diff_spans).
+        """
+        self.apply_replacements(idx, diff_spans(self.cleaned_reports[idx], new_text), change_type)
+
+    def apply_replacements(self, report_idx, replacements, change_type):
+        """
+        Apply (start, end, replacement) spans to one report in one splice
+        (see ReportDocument.replace), track each change and drop the now
+        stale cached parse and index entries.
+        """
+        doc = self.documents[report_idx]
+        old_text = doc.text
+        applied = doc.replace(replacements, change_type)
+        if not applied:
+            return
+        if self.session_log is not None:
+            self.session_log.append("edit", report_idx, applied, change_type)
+        new_text = doc.text
+        if old_text != new_text:
+            self.text_refs[DocCache.key(new_text)] += 1
+            old_key = DocCache.key(old_text)
+            self.text_refs[old_key] -= 1
+            if self.text_refs[old_key] <= 0:  # no other report has the old text
+                del self.text_refs[old_key]
+                self.doc_cache.discard(old_text)
+                self.analyses.pop(old_key, None)
+                self.keyword_hits_cache.pop(old_key, None)
+            for results in self.detections.values():
+                results.mark_dirty(report_idx)
+            if self.word_index is not None:
+                self.word_index.update(report_idx, new_text)
+            if self.misspelled_index is not None:
+                self.index_vocabulary(report_idx, old_text, remove=True)
+                self.index_vocabulary(report_idx, new_text)
+
+    # ---------- batched corpus analysis ----------
+    @staticmethod
+    def doc_to_analysis(doc):
+        return {
+            "tokens": [t.text for t in doc],
+            "offsets": [t.idx for t in doc],
+            "lemmas": [t.lemma_.lower() for t in doc],
+            "ents": [
+                Entity(ent.text, ent.label_, ent.start, ent.end, ent.start_char, ent.end_char)
+                for ent in doc.ents
+            ],
+        }
+
+    def analyze_reports(self, reports=None):
+        """
+        Stream every report without an up-to-date analysis through nlp.pipe
+        in a single pass (batch_size / n_process) and keep its entities,
+        lemmas and token offsets. Identical reports are only parsed once.
+        """
+        if reports is None:
+            reports = self.cleaned_reports
+        for _ in self.iter_analyses(reports, max(len(reports), 1)):
+            pass
+
+    def iter_analyses(self, reports, chunk_size):
+        """
+        analyze_reports, lazily: yields once per chunk_size reports, when
+        all of them are analyzed. The whole run is still one nlp.pipe pass,
+        so worker processes (n_process) start only once.
+        """
+        todo = {}
+        new_per_chunk = []  # number of texts first seen in each chunk
+        for start in range(0, len(reports), chunk_size):
+            n = len(todo)
+            for report in reports[start:start + chunk_size]:
+                key = DocCache.key(report)
+                if key not in self.analyses and key not in todo:
+                    todo[key] = report
+            new_per_chunk.append(len(todo) - n)
+
+        keys = iter(todo)
+        docs = self.pipe_model(todo.values(), batch_size=self.batch_size, n_process=self.n_process)
+        for n in new_per_chunk:
+            analyses = {key: self.doc_to_analysis(doc) for key, doc in zip(itertools.islice(keys, n), docs)}
+            self.analyses.update(analyses)
+            if analyses and self.session_log is not None:
+                # entities as plain tuples, see SessionLog
+                self.session_log.append("analyses", {
+                    key: dict(analysis, ents=[tuple(ent) for ent in analysis["ents"]])
+                    for key, analysis in analyses.items()
+                })
+            yield
+
+    def iter_detections(self, name, detect, resolve=None, chunk_size=None):
+        """
+        Results of a per-report detector, yielded in report order per chunk
+        as ((reports analyzed, reports to analyze), [(report_idx, result)]).
+        Only the dirty reports of self.detections[name] are analyzed, chunk
+        by chunk, and passed to detect(report_idx, text); the others reuse
+        their kept result, so re-entering a step costs time in proportion
+        to the edits since. resolve(new_items) runs once per chunk on the
+        new results, e.g. to look up suggestions.
+        """
+        store = self.detections[name]
+        todo = sorted(store.dirty)
+        kept = sorted(store.results.items(), key=lambda item: item[0])
+        kept_indices = [i for i, _ in kept]
+        chunk_size = chunk_size or self.batch_size * 4
+        all_texts = [self.cleaned_reports[i] for i in todo]  # the GUI may edit reports meanwhile
+        analyzed = self.iter_analyses(all_texts, chunk_size)  # one nlp.pipe pass for all chunks
+        k = 0
+        for start in range(0, len(todo), chunk_size):
+            indices = todo[start:start + chunk_size]
+            texts = all_texts[start:start + chunk_size]
+            next(analyzed)
+            found = [(i, detect(i, text)) for i, text in zip(indices, texts)]
+            new_items = [(i, result) for i, result in found if result]
+            if resolve is not None and new_items:
+                resolve(new_items)
+            for (i, result), text in zip(found, texts):
+                # edits mark the report dirty only after changing its text
+                store.set_if_unchanged(i, result, lambda: self.cleaned_reports[i], text)
+
+            # kept results up to the end of the chunk, merged in report order
+            end = bisect.bisect_right(kept_indices, indices[-1], lo=k)
+            items = sorted(kept[k:end] + new_items, key=lambda item: item[0])
+            k = end
+            yield (start + len(indices), len(todo)), items
+        if k < len(kept) or not todo:
+            yield (len(todo), len(todo)), kept[k:]
+
+    def analysis_for(self, text):
+        key = DocCache.key(text)
+        analysis = self.analyses.get(key)
+        if analysis is None:
+            analysis = self.doc_to_analysis(self.parse(text))
+            self.analyses[key] = analysis
+        return analysis
+
+    def keyword_hits(self, text):
+        """Keyword hits in a report as [(start_char, end_char, keyword)], cached per text."""
+        key = DocCache.key(text)
+        hits = self.keyword_hits_cache.get(key)
+        if hits is None:
+            hits = self.keyword_matcher.matches(self.analysis_for(text), text)
+            self.keyword_hits_cache[key] = hits
+        return hits
+
+    @staticmethod
+    def entity_context(analysis, ent, window=5):
+        """Tokens around an entity, with the entity itself in brackets."""
+        tokens = analysis["tokens"]
+        start_token = max(ent.start - window, 0)
+        end_token = min(ent.end + window, len(tokens))
+        context_tokens = tokens[start_token:ent.start]                 # tokens before entity
+        context_tokens.append(f"[{ent.text}]")                          # entity itself
+        context_tokens += tokens[ent.end:end_token]                     # tokens after entity
+        return " ".join(context_tokens)
+
     # select and deselect buttons
     def select_all_current(self):
-        if self.step == 0 and hasattr(self, "match_vars"):
-            for m in self.match_vars:
-                m[2].set(True)  # Step 0: var is at index 2
-        elif self.step == 1 and hasattr(self, "name_vars"):
-            for m in self.name_vars:
-                m["var"].set(True)
+        if self.step in (0, 1, 2):
+            self.match_list.select_all(True)
     
     def deselect_all_current(self):
-        if self.step == 0 and hasattr(self, "match_vars"):
-            for m in self.match_vars:
-                m[2].set(False)
-        elif self.step == 1 and hasattr(self, "name_vars"):
-            for m in self.name_vars:
-                m["var"].set(False)
+        if self.step in (0, 1, 2):
+            self.match_list.select_all(False)
 
 
 
     # ---------- Spellcheck ----------
-    def get_spellcheck_indices(self):
-        flagged = []
+    def correction(self, word):
+        """self.spell.correction, memoized across reports (and sessions if persisted)."""
+        key = word.lower()  # corrections do not depend on case
+        with self._corrections_lock:
+            if key in self.corrections:
+                self.corrections.move_to_end(key)
+                return self.corrections[key]
+
+        suggestion = LookupCache.MISSING
+        if self.correction_store is not None:
+            suggestion = self.correction_store.get("spelling", key)
+        if suggestion is LookupCache.MISSING:
+            suggestion = self.spell.correction(key)
+            if self.correction_store is not None:
+                self.correction_store.set("spelling", key, suggestion)
+
+        self.remember_corrections({key: suggestion})
+        return suggestion
+
+    def remember_corrections(self, corrections):
+        with self._corrections_lock:
+            for key, suggestion in corrections.items():
+                self.corrections[key] = suggestion
+                self.corrections.move_to_end(key)
+            while len(self.corrections) > self.correction_cache_size:
+                self.corrections.popitem(last=False)
+
+    def is_misspelled(self, clean_w):
+        status = self.spelling_status.get(clean_w)
+        if status is None:
+            status = bool(clean_w) and clean_w.isalpha() and clean_w.lower() not in self.spell and clean_w.lower() not in self.exceptions
+            self.spelling_status[clean_w] = status
+        return status
+
+    # ---------- spellcheck vocabulary ----------
+    def build_vocabulary(self):
+        """
+        One pass over the corpus collecting every unique word (split on
+        whitespace, punctuation stripped) and the reports it occurs in. Each
+        unique word is checked against the dictionary once; misspelled_index
+        keeps the misspelled ones: {word: set of report indices}.
+        """
+        self.misspelled_index = {}
         for i, report in enumerate(self.cleaned_reports):
-            words = report.split()
-            misspelled = []
-            for w in words:
-                clean_w = w.strip(string.punctuation)  # remove leading/trailing punctuation
-                if clean_w and clean_w.isalpha() and clean_w.lower() not in self.spell and clean_w.lower() not in self.exceptions:
-                    misspelled.append(w)
-            if misspelled:
-                flagged.append(i)
-        return flagged
+            self.index_vocabulary(i, report)
+
+    def index_vocabulary(self, idx, text, remove=False):
+        for clean_w in {w.strip(string.punctuation) for w in text.split()}:
+            if not self.is_misspelled(clean_w):
+                continue
+            if remove:
+                reports = self.misspelled_index.get(clean_w)
+                if reports is not None:
+                    reports.discard(idx)
+                    if not reports:
+                        del self.misspelled_index[clean_w]
+            else:
+                self.misspelled_index.setdefault(clean_w, set()).add(idx)
+
+    def prefill_corrections(self, indices):
+        """Compute the corrections for all misspelled words of these reports ahead of time."""
+        for idx in indices:
+            for w in self.cleaned_reports[idx].split():
+                clean_w = w.strip(string.punctuation)
+                if self.is_misspelled(clean_w):
+                    self.correction(clean_w)
+
+    def start_suggestion_workers(self, indices, background=True):
+        """
+        Compute the corrections of all misspelled words of these reports in
+        worker processes (see SuggestionWorkers), in report order; each word
+        only once. Small jobs and spell_workers=0 (the default) use a thread
+        instead, or run right away if background is False.
+        Returns the workers, or None if no processes were started.
+        """
+        self.stop_suggestion_workers()
+
+        with self._corrections_lock:
+            seen = set(self.corrections)
+        jobs = []
+        for idx in indices:
+            words = []
+            for clean_w in {w.strip(string.punctuation) for w in self.cleaned_reports[idx].split()}:
+                if self.is_misspelled(clean_w) and clean_w.lower() not in seen:
+                    seen.add(clean_w.lower())
+                    words.append(clean_w.lower())
+            if words:
+                jobs.append((idx, words))
+
+        if self.spell_workers == 0 or sum(len(words) for _, words in jobs) < 100:
+            if background:
+                threading.Thread(target=self.prefill_corrections, args=(list(indices),), daemon=True).start()
+            else:
+                self.prefill_corrections(indices)
+            return None
+        self.suggestion_workers = SuggestionWorkers(jobs, self.spell_workers)
+        return self.suggestion_workers
+
+    def collect_suggestions(self, block=False):
+        """
+        Move finished worker results into the correction cache. Returns
+        True while more results are to come.
+        """
+        workers = self.suggestion_workers
+        while workers is not None:
+            try:
+                item = workers.results.get(block=block)
+            except queue.Empty:
+                return True
+
+            if item is None:  # all done
+                self.suggestion_workers = None
+                if workers.failed is not None:
+                    print(f"Spellcheck worker processes failed ({workers.failed!r}), continuing without them")
+                return False
+
+            corrections = dict(item[1])
+            self.remember_corrections(corrections)
+            if self.correction_store is not None:
+                self.correction_store.set_many("spelling", corrections)
+        return False
+
+    def stop_suggestion_workers(self):
+        if self.suggestion_workers is not None:
+            self.suggestion_workers.stop()
+            self.suggestion_workers = None
+
+    def poll_suggestions(self):
+        if self.collect_suggestions():
+            self.root.after(100, self.poll_suggestions)
+
+    def get_spellcheck_indices(self):
+        if self.misspelled_index is None:
+            self.build_vocabulary()
+        flagged = set()
+        for reports in self.misspelled_index.values():
+            flagged.update(reports)
+        return sorted(flagged)
 
     # ---------- helper: lightweight normalization ----------
     @staticmethod
@@ -236,16 +2715,13 @@ class DreamCruncher:
     
     # ---------- flagging reports ----------
     def get_flagged_indices(self):
-        flagged = []
-        for i, report in enumerate(self.cleaned_reports):
-            doc = self.nlp(report)
-            for token in doc:
-                lemma = token.lemma_.lower()
-                lemma = self.normalize_word(lemma)  # fallback
-                if lemma in self.keywords and lemma not in self.exceptions:
-                    flagged.append(i)
-                    break
-        return flagged
+        return [i for _, flagged in self.iter_flagged_indices() for i in flagged]
+
+    def iter_flagged_indices(self):
+        """Flagged report indices, yielded per chunk as ((reports done, total), indices)."""
+        found = self.iter_detections("keywords", lambda i, report: self.keyword_hits(report))
+        for progress, items in found:
+            yield progress, [i for i, _ in items]
 
     # ---------- Loading ----------
     def load_report(self):
@@ -255,6 +2731,10 @@ class DreamCruncher:
             self.label.config(
                 text=f"Correct spelling mistakes ({self.current_index + 1}/{len(self.spellcheck_indices)})"
             )
+            # this report and the next one go to the front of the suggestion queue
+            if self.suggestion_workers is not None:
+                for ahead in reversed(self.spellcheck_indices[self.current_index:self.current_index + 2]):
+                    self.suggestion_workers.prioritize(ahead)
         elif self.step == 4:
             # Keyword step
             idx = self.flagged_indices[self.current_index]
@@ -278,50 +2758,47 @@ class DreamCruncher:
         
             
     # ---------- Highlight misspelled words ----------
+    @staticmethod
+    def tag_spans(widget, tag, spans):
+        """Tag (start, end) character offsets of a Text widget's content in one call."""
+        widget.tag_remove(tag, "1.0", tk.END)
+        indices = []
+        for start, end in spans:
+            indices += (f"1.0+{start}c", f"1.0+{end}c")
+        if indices:
+            widget.tag_add(tag, *indices)
+
     def highlight_misspelled_words(self, text):
-        self.text_area.tag_remove("misspelled", "1.0", tk.END)
-    
-        words = text.split()
-        start_index = "1.0"
-    
-        for word in words:
-            clean_w = word.strip(string.punctuation)
-    
-            idx_start = self.text_area.search(word, start_index, stopindex=tk.END)
-            if not idx_start:
-                continue
-            idx_end = f"{idx_start}+{len(word)}c"
-    
-            if clean_w and clean_w.isalpha() and clean_w.lower() not in self.spell and clean_w.lower() not in self.exceptions:
-                self.text_area.tag_add("misspelled", idx_start, idx_end)
-    
-            start_index = idx_end
-    
+        spans = [
+            (m.start(), m.end()) for m in re.finditer(r"\S+", text)
+            if self.is_misspelled(m.group().strip(string.punctuation))
+        ]
+        self.tag_spans(self.text_area, "misspelled", spans)
         self.text_area.tag_config("misspelled", foreground="red")
 
     # ---------- Saving ----------
     def save_current(self):
         if self.step == 3:
             idx = self.spellcheck_indices[self.current_index]
-        elif self.step == 4:
+        elif self.step == 4 and self.flagged_indices:
             idx = self.flagged_indices[self.current_index]
         else:
-            return  # nothing to save for Step 0/1
+            return  # nothing to save for Step 0/1, or no keyword report found yet
     
-        old_text = self.cleaned_reports[idx]
-        new_text = self.text_area.get("1.0", tk.END).strip()
+        # without the newline Tk adds at the end, so the report keeps its own whitespace
+        new_text = self.text_area.get("1.0", "end-1c")
         
-        # Only track if there’s a real change
-        if old_text != new_text:
-            self.changes[idx].append((0, len(new_text), old_text, new_text, "keyword"))
-        
-        self.cleaned_reports[idx] = new_text
+        # Only tracked if there’s a real change
+        self.set_report(idx, new_text, "keyword")
 
         
         
     # ---------- Save & Exit ----------
     def save_and_exit(self):
         self.save_current()
+        self.close_checkpoint()
+        self.cancel_task()
+        self.stop_suggestion_workers()
         self.tracked_changes = self.changes_to_dataframe(
             self.original_reports, 
             self.cleaned_reports,
@@ -330,36 +2807,23 @@ class DreamCruncher:
         self.root.destroy()
     
     @staticmethod
-    def changes_to_dataframe(original_reports, cleaned_reports, changes, context_window=10):
-        rows = []
-        
-        for i, report_changes in changes.items():
-            original = original_reports[i]
-            cleaned = cleaned_reports[i]
-            
-            for change in report_changes:
-                start, end, old_text, new_text, change_type = change
-                
-                # get context from original report
-                start_ctx = max(0, start - context_window)
-                end_ctx = min(len(original), end + context_window)
-                context = original[start_ctx:end_ctx].replace("\n", " ")
-                
-                rows.append({
-                    "report_idx": i,
-                    "original_report": original,
-                    "cleaned_report": cleaned,
-                    "change_type": change_type,
-                    "old_text": old_text,
-                    "new_text": new_text,
-                    "context": context
-                })
-        
-        df = pd.DataFrame(rows)
-        return df
+    def changes_to_dataframe(original_reports, cleaned_reports, changes, context_window=10, wide=True):
+        """Tracked changes as a DataFrame, see ChangeTable.to_dataframe."""
+        return ChangeTable(original_reports, cleaned_reports, changes, context_window).to_dataframe(wide=wide)
+
+    def export_changes(self, path, reports_path=None, context_window=10):
+        """
+        Write the tracked changes to a .parquet, .arrow, .csv or .jsonl file
+        without building the wide DataFrame; the changed reports go once to
+        reports_path if given (see ChangeTable.write).
+        """
+        ChangeTable(self.original_reports, self.cleaned_reports, self.changes, context_window).write(path, reports_path)
         
     def on_close(self):
         self.save_current()  # save the currently visible report
+        self.close_checkpoint()
+        self.cancel_task()
+        self.stop_suggestion_workers()
         
         self.tracked_changes = self.changes_to_dataframe(self.original_reports, 
                                                        self.cleaned_reports,
@@ -370,6 +2834,9 @@ class DreamCruncher:
         
     def finalize_and_close(self):
         self.save_current()
+        self.close_checkpoint()
+        self.cancel_task()
+        self.stop_suggestion_workers()
         self.tracked_changes = self.changes_to_dataframe(
             self.original_reports,
             self.cleaned_reports,
@@ -393,6 +2860,8 @@ class DreamCruncher:
             if self.current_index < len(self.flagged_indices) - 1:
                 self.current_index += 1
                 self.load_report()
+            elif self.task is not None:
+                self.label.config(text="Still looking for reports with keywords...")
             else:
                 self.finalize_and_close()
     
@@ -417,74 +2886,67 @@ class DreamCruncher:
             self.apply_places_btn.pack_forget()
         
         # hide name checkboxes / context
-        for widget in self.context_area_frame.winfo_children():
-            widget.destroy()
+        self.match_list.clear()
+        self.stop_suggestion_workers()
         self.step = 4
-        self.flagged_indices = self.get_flagged_indices()
+        self.flagged_indices = []
         self.current_index = 0
         self.label.config(text="Remove unrelated phrases")
         self.root.title("Dream Reports Cleaner - Keyword Cleaning Step")
     
         # One-line tweak: make sure the text area is visible
         self.text_area.pack(side=tk.LEFT, padx=5, fill=tk.BOTH, expand=True)
+        self.text_area.delete("1.0", tk.END)
     
         # Hide spellcheck widgets
         self.suggestion_area.pack_forget()
         self.accept_btn.pack_forget()
     
-        if self.flagged_indices:
+        # flag the reports in the background; the first one shows as soon as it is found
+        self.start_task(
+            self.iter_flagged_indices, self.add_flagged_reports, self.flagged_reports_done,
+            "Dream Reports Cleaner - Keyword Cleaning Step"
+        )
+
+    def add_flagged_reports(self, indices):
+        first = not self.flagged_indices
+        self.flagged_indices += indices
+        if not self.flagged_indices:
+            return
+        state = self._resume_state
+        if state is not None and state["step"] == 4 and state["current_index"] < len(self.flagged_indices):
+            # resumed session: back to the report where it was left
+            self._resume_state = None
+            self.current_index = state["current_index"]
+            self.load_report()
+        elif first:
             self.load_report()
         else:
+            self.label.config(
+                text=f"Remove unrelated phrases ({self.current_index + 1}/{len(self.flagged_indices)})"
+            )
+
+    def flagged_reports_done(self):
+        self._resume_state = None
+        if not self.flagged_indices:
             self.finalize_and_close()
 
             
     # ---------- highlighting keywords ----------
     def highlight_keywords(self, text):
-        self.text_area.tag_remove("keyword", "1.0", tk.END)
-        doc = self.nlp(text)
-    
-        # --- highlight normal words using spaCy + normalization ---
-        for token in doc:
-            lemma = token.lemma_.lower()
-            lemma = self.normalize_word(lemma)
-            if lemma in self.keywords and lemma not in self.exceptions:
-                start_idx = "1.0"
-                while True:
-                    start_idx = self.text_area.search(token.text, start_idx, stopindex=tk.END)
-                    if not start_idx:
-                        break
-                    end_idx = f"{start_idx}+{len(token.text)}c"
-                    self.text_area.tag_add("keyword", start_idx, end_idx)
-                    start_idx = end_idx
-    
-        # --- highlight special/non-alphabetic keywords ---
-        for kw in self.keywords:
-            if kw.isalpha() or not kw:  # skip normal words and empty strings
-                continue
-            start_idx = "1.0"
-            while True:
-                start_idx = self.text_area.search(kw, start_idx, stopindex=tk.END)
-                if not start_idx:
-                    break
-                end_idx = f"{start_idx}+{len(kw)}c"
-                self.text_area.tag_add("keyword", start_idx, end_idx)
-                start_idx = end_idx
-    
+        # the same hits that flagged the report (see keyword_hits)
+        spans = [(start, end) for start, end, _ in self.keyword_hits(text)]
+        self.tag_spans(self.text_area, "keyword", spans)
         self.text_area.tag_config("keyword", foreground="orange")
 
     
     def get_replace_contexts(self, report, targets, window=5):
-        doc = self.nlp(report)
+        analysis = self.analysis_for(report)
         contexts = []
     
-        for ent in doc.ents:
-            if ent.label_ == "PERSON" and ent.text in targets:
-                start_token = max(ent.start - window, 0)
-                end_token = min(ent.end + window, len(doc))
-                context_tokens = [t.text for t in doc[start_token:ent.start]]  # tokens before entity
-                context_tokens.append(f"[{ent.text}]")                          # entity itself
-                context_tokens += [t.text for t in doc[ent.end:end_token]]      # tokens after entity
-                contexts.append((ent.text, " ".join(context_tokens)))
+        for ent in analysis["ents"]:
+            if ent.label == "PERSON" and ent.text in targets:
+                contexts.append((ent.text, self.entity_context(analysis, ent, window)))
     
         # fallback
         if not contexts:
@@ -492,116 +2954,92 @@ class DreamCruncher:
                 contexts.append((t, f"[{t}]"))
         return contexts
 
+    def find_word(self, word):
+        """All occurrences of a word as (report_idx, matched_text, context, start_char, end_char)."""
+        if self.word_index is None:
+            self.word_index = WordIndex(self.tokenizer)
+            self.word_index.build(self.cleaned_reports)
+        return [(i, *self.word_index.match(i, pos, window=5)) for i, pos in self.word_index.find(word)]
 
+    def find_patterns(self, patterns, regex=False):
+        """
+        All matches of many patterns at once, as (report_idx, matched_text,
+        context, start_char, end_char, replacement). `patterns` is a
+        {pattern: replacement} dict, a pattern file (see read_patterns) or a
+        compiled MultiPattern.
+        """
+        if not isinstance(patterns, MultiPattern):
+            if not isinstance(patterns, dict):
+                patterns = read_patterns(patterns)
+            patterns = MultiPattern(patterns, regex=regex)
 
-    def get_word_contexts(self, report, targets, window=5):
-        doc = self.nlp(report)
-        contexts = []
-        lowered_targets = [t.lower() for t in targets]
-    
-        for token in doc:
-            token_text = token.text.strip(string.punctuation)
-            if not token_text:
-                continue
-            if token_text.lower() in lowered_targets:
-                idx = token.i
-    
-                # move left until we've collected `window` words (non-empty after stripping punctuation)
-                left = idx
-                words = 0
-                while left > 0 and words < window:
-                    left -= 1
-                    if doc[left].text.strip(string.punctuation):
-                        words += 1
-    
-                # move right until we've collected `window` words
-                right = idx
-                words = 0
-                while right < len(doc) - 1 and words < window:
-                    right += 1
-                    if doc[right].text.strip(string.punctuation):
-                        words += 1
-    
-                # build context tokens and char offsets
-                context_tokens = [t.text for t in doc[left:idx]]
-                context_tokens.append(f"[{token.text}]")
-                context_tokens += [t.text for t in doc[idx + 1 : right + 1]]
-    
-                start_char = token.idx
-                end_char = token.idx + len(token.text)
-                contexts.append((token.text, " ".join(context_tokens), start_char, end_char))
-    
-        return contexts
-
+        matches = []
+        for i, report in enumerate(self.cleaned_reports):
+            for start, end, repl in patterns.finditer(report):
+                matches.append((i, report[start:end], text_context(report, start, end), start, end, repl))
+        return matches
 
+    def replace_matches(self, matches, replace_word=None):
+        """
+        Replace matches from find_word with replace_word, or matches from
+        find_patterns with their own replacement.
+        """
+        # collect replacements per report: (start, end, repl)
+        replacements_by_report = {}
+        for match in matches:
+            report_idx, start_char, end_char = match[0], match[3], match[4]
+            repl = match[5] if replace_word is None else replace_word
+            replacements_by_report.setdefault(report_idx, []).append((start_char, end_char, repl))
+        for report_idx, reps in replacements_by_report.items():
+            self.apply_replacements(report_idx, reps, "replace")
 
     # find words
     def find_word_step0(self):
         word = self.find_entry.get().strip()
         if not word:
             return
-    
-        # clear previous results
-        for widget in self.context_area_frame.winfo_children():
-            widget.destroy()
-    
-        self.match_vars = []  # store checkboxes for matches; structure: (report_idx, matched_text, var, start_char, end_char)
-    
-        found_any = False
-        for i, report in enumerate(self.cleaned_reports):
-            ctxs = self.get_word_contexts(report, [word], window=5)
-            if ctxs:
-                found_any = True
-                tk.Label(self.context_area_frame, text=f"Report {i+1}:", fg="blue").pack(anchor="w")
-    
-                for matched_text, ctx, start_char, end_char in ctxs:
-                    var = tk.BooleanVar(value=True)  # default: selected
-                    chk = tk.Checkbutton(
-                        self.context_area_frame,
-                        text=f"...{ctx}...",
-                        variable=var,
-                        anchor="w",
-                        justify="left"
-                    )
-                    chk.pack(anchor="w", fill="x")
-                    # store offsets so replacement is precise
-                    self.match_vars.append((i, matched_text, var, start_char, end_char))
-    
-        if not found_any:
-            tk.Label(
-                self.context_area_frame,
-                text=f"No occurrences of '{word}' found.",
-                fg="red"
-            ).pack(anchor="w")
+        self.patterns = None  # back to single word mode
+        self.show_matches_step0(self.find_word(word), f"No occurrences of '{word}' found.")
+
+    def load_patterns_step0(self):
+        path = filedialog.askopenfilename(
+            title="Find & replace patterns",
+            filetypes=[("Pattern files", "*.csv *.tsv *.txt *.json"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            self.patterns = MultiPattern(read_patterns(path), regex=self.regex_var.get())
+        except (OSError, ValueError, re.error) as e:
+            messagebox.showerror("Patterns", f"Could not load patterns:\n{e}")
+            return
+        self.show_matches_step0(self.find_patterns(self.patterns), f"No matches for {len(self.patterns)} patterns found.")
+
+    def show_matches_step0(self, matches, empty_text):
+        # clear previous results; the matches keep their offsets so replacement is precise
+        self.match_list.clear(empty_text)
+        self.match_list.add_rows(
+            (match[0], f"...{match[2]}..." + (f"  →  {match[5]}" if len(match) > 5 else ""), None, match)
+            for match in matches
+        )
 
 
 
     def replace_word_step0(self):
+        # match is (report_idx, matched_text, context, start_char, end_char[, replacement])
+        selected = [match for match, _ in self.match_list.selected_rows()]
+
+        if self.patterns is not None:
+            # each pattern match has its own replacement
+            self.replace_matches(selected)
+            self.show_matches_step0(self.find_patterns(self.patterns), f"No matches for {len(self.patterns)} patterns found.")
+            return
+
         find_word = self.find_entry.get().strip()
         replace_word = self.replace_entry.get().strip()
         if not find_word:
             return
-    
-        # collect replacements per report: (start, end, repl)
-        replacements_by_report = {}
-        for item in self.match_vars:
-            # item is (report_idx, matched_text, var, start_char, end_char)
-            report_idx, _, var, start_char, end_char = item
-            if var.get():
-                replacements_by_report.setdefault(report_idx, []).append((start_char, end_char, replace_word))
-    
-        # apply each report's replacements in reverse order (by start offset)
-        for report_idx, reps in replacements_by_report.items():
-            text = self.cleaned_reports[report_idx]
-            reps_sorted = sorted(reps, key=lambda x: x[0], reverse=True)
-            for start, end, repl in reps_sorted:
-                old_text = text[start:end]
-                text = text[:start] + repl + text[end:]
-                
-                # Track change
-                self.changes[report_idx].append((start, start+len(repl), old_text, repl, "replace"))
-                
-            self.cleaned_reports[report_idx] = text
+        self.replace_matches(selected, replace_word)
     
         # Refresh the checkboxes / contexts to reflect new text
         self.find_word_step0()
@@ -625,12 +3063,16 @@ class DreamCruncher:
             self.apply_places_btn.pack_forget()
         
         # hide name checkboxes / context
-        for widget in self.context_area_frame.winfo_children():
-            widget.destroy()
+        self.match_list.clear()
+        self.cancel_task()
         self.step = 3
         self.label.config(text="Correct spelling mistakes")
         self.spellcheck_indices = self.get_spellcheck_indices()
         self.current_index = 0
+
+        # work out the suggestions of the following reports while the user reviews
+        if self.start_suggestion_workers(self.spellcheck_indices[1:]) is not None:
+            self.poll_suggestions()
     
         # Hide Step 0 widgets
         # self.context_area.pack_forget()
@@ -652,22 +3094,20 @@ class DreamCruncher:
 
 
             
-    def populate_suggestions(self, text): 
-        self.suggestion_area.delete("1.0", tk.END)
-        self.suggestion_area.tag_config("changed", foreground="green")
-    
-        # Split into words & newlines, so we keep full structure
-        tokens = re.findall(r'\S+|\n', text)
-    
-        for tok in tokens:
-            if tok == "\n":
-                self.suggestion_area.insert(tk.END, "\n")
+    def spelling_suggestions(self, text):
+        """
+        Yield (token, suggested token) for the words and the whitespace
+        between them, so that joining the suggestions keeps the layout.
+        """
+        for tok in re.findall(r"\S+|\s+", text):
+            if tok.isspace():
+                yield tok, tok
                 continue
     
             clean_w = tok.strip(string.punctuation)
             if clean_w and clean_w.isalpha() and clean_w.lower() not in self.exceptions:
                 if clean_w.lower() not in self.spell:
-                    suggestion = self.spell.correction(clean_w)
+                    suggestion = self.correction(clean_w)
                     if not suggestion:  # <-- no suggestion found
                         final_word = tok
                     else:
@@ -678,127 +3118,139 @@ class DreamCruncher:
                     final_word = tok
             else:
                 final_word = tok
-    
-            # Insert word
-            start_idx = self.suggestion_area.index("insert")
-            self.suggestion_area.insert(tk.END, final_word + " ")
-            end_idx = self.suggestion_area.index("insert")
-    
+            yield tok, final_word
+
+    def correct_spelling(self, text):
+        """The report as the suggestion pane shows it, with all corrections applied."""
+        return "".join(final_word for _, final_word in self.spelling_suggestions(text))
+
+    def spelling_edits(self, text):
+        """
+        The corrections of correct_spelling as (start, end, replacement)
+        spans of the corrected words, for apply_replacements without a diff.
+        """
+        edits = []
+        offset = 0
+        for tok, final_word in self.spelling_suggestions(text):
+            if final_word != tok:
+                # the surrounding punctuation is kept as is
+                p = len(tok) - len(tok.lstrip(string.punctuation))
+                q = len(tok) - len(tok.rstrip(string.punctuation))
+                edits.append((offset + p, offset + len(tok) - q, final_word[p:len(final_word) - q]))
+            offset += len(tok)
+        return edits
+
+    def populate_suggestions(self, text): 
+        # build the pane's text and the spans of the changed words, then insert it once
+        pieces = []
+        changed = []
+        offset = 0
+        for tok, final_word in self.spelling_suggestions(text):
+            pieces.append(final_word)
             # Highlight if changed
             if final_word != tok:
-                self.suggestion_area.tag_add("changed", start_idx, f"{end_idx} -1c")
+                changed.append((offset, offset + len(final_word)))
+            offset += len(final_word)
+
+        self.suggestion_area.delete("1.0", tk.END)
+        self.suggestion_area.insert(tk.END, "".join(pieces))
+        self.tag_spans(self.suggestion_area, "changed", changed)
+        self.suggestion_area.tag_config("changed", foreground="green")
 
         
     def accept_suggestions(self):
-        suggested_text = self.suggestion_area.get("1.0", tk.END).strip()
+        # without the newline Tk adds at the end, so the report keeps its own whitespace
+        new_text = self.suggestion_area.get("1.0", "end-1c")
         self.text_area.delete("1.0", tk.END)
-        self.text_area.insert(tk.END, suggested_text)
+        self.text_area.insert(tk.END, new_text)
         
         idx = self.spellcheck_indices[self.current_index]
-        old_text = self.cleaned_reports[idx]
-        new_text = self.suggestion_area.get("1.0", tk.END).strip()
-        
-        self.cleaned_reports[idx] = new_text
         
-        # Track the change for the full report
-        self.changes[idx].append((0, len(new_text), old_text, new_text, "spellcheck"))
+        # Track the change for the edited part of the report
+        report = self.cleaned_reports[idx]
+        if new_text == self.correct_spelling(report):
+            self.apply_replacements(idx, self.spelling_edits(report), "spellcheck")
+        else:  # the suggestions were edited by hand
+            self.set_report(idx, new_text, "spellcheck")
         
 
+    # ---------- Wikidata lookups ----------
+    def resolve_entities(self, kind, entities):
+        """
+        Suggestions for many entities of one kind ("name" or "place").
+        Entities are deduplicated by their normalized text, answered from
+        the lookup cache where possible and the rest are resolved
+        concurrently. Returns {entity: suggestion}.
+        """
+        classify = self.classifier.occupations if kind == "name" else self.classifier.places
+
+        resolved = {}  # normalized entity -> cached value
+        todo = {}      # normalized entity -> entity to look up
+        for entity in entities:
+            key = LookupCache.normalize(entity)
+            if key in resolved or key in todo:
+                continue
+            value = self.lookup_cache.get(kind, entity)
+            if value is LookupCache.MISSING:
+                todo[key] = entity
+            else:
+                resolved[key] = value
+
+        if todo and self.gazetteer is not None:
+            # offline: answered from the gazetteer only, which needs no cache
+            descriptions = self.gazetteer.search_many(kind, todo.values())
+            values = classify(descriptions.values())
+            for entity, description in descriptions.items():
+                resolved[LookupCache.normalize(entity)] = values[description]
+        elif todo:
+            # failed lookups are not cached and fall back to the default below
+            descriptions = self.wikidata.search_many(todo.values())
+            values = classify(descriptions.values())  # all descriptions at once
+            fetched = {entity: values[description] for entity, description in descriptions.items()}
+            self.lookup_cache.set_many(kind, fetched)
+            resolved.update((LookupCache.normalize(e), value) for e, value in fetched.items())
+
+        suggestions = {}
+        for entity in entities:
+            value = resolved.get(LookupCache.normalize(entity))
+            if kind == "name":
+                suggestions[entity] = value or entity[0] + "."  # no famous match → first initial
+            else:
+                suggestions[entity] = value or "place"
+        return suggestions
+
     def get_name_suggestion(self, name):
-        search_url = f"https://www.wikidata.org/w/api.php?action=wbsearchentities&search={name}&language=en&limit=1&format=json"
-        headers = {"User-Agent": "Python"}
-    
-        occupation_keywords = {
-            # Arts & Entertainment
-            "actor", "actress", "singer", "musician", "songwriter", "composer",
-            "dancer", "director", "producer", "painter", "artist", "poet",
-            "writer", "author", "novelist", "playwright", "comedian", "performer",
-            "entertainer", "cartoonist", "illustrator", "editor",
-            
-            # Media & Broadcasting
-            "host", "presenter", "broadcaster", "journalist", "anchor",
-            "reporter", "talk show host",
-            
-            # Academia & Philosophy
-            "philosopher", "scientist", "physicist", "chemist", "mathematician",
-            "biologist", "historian", "professor", "researcher", "academic",
-            "scholar",
-            
-            # Politics & Leadership
-            "president", "prime minister", "chancellor", "king", "queen",
-            "emperor", "politician", "diplomat", "senator", "mayor", "governor",
-            
-            # Sports
-            "athlete", "footballer", "basketball player", "soccer player",
-            "swimmer", "runner", "coach", "manager", "olympian",
-            
-            # Business & Miscellaneous Famous Roles
-            "entrepreneur", "inventor", "activist", "philanthropist", "chef",
-            "designer", "architect", "lawyer", "judge"
-        }
-    
-        try:
-            response = requests.get(search_url, headers=headers, timeout=5)
-            response.raise_for_status()
-            data = response.json()
-    
-            # No match → fallback to first initial
-            if not data.get("search"):
-                return name[0] + "."
-    
-            description = data["search"][0].get("description", "").lower()
-    
-            # Generic names or places → first initial
-            if "given name" in description or "family name" in description:
-                return name[0] + "."
-    
-            # Remove parentheses and commas
-            desc_clean = description.split("(")[0].split(",")[0]
-            doc = self.nlp(desc_clean)
-    
-            # --- Extract consecutive nouns as phrases ---
-            phrases = []
-            current_phrase = []
-            for token in doc:
-                if token.pos_ == "NOUN":
-                    current_phrase.append(token.text.lower())
-                else:
-                    if current_phrase:
-                        phrases.append(" ".join(current_phrase))
-                        current_phrase = []
-            if current_phrase:
-                phrases.append(" ".join(current_phrase))
-    
-            # --- Pick the first phrase that contains an occupation keyword ---
-            for phrase in phrases:
-                if any(kw in phrase for kw in occupation_keywords):
-                    return phrase
-    
-            # Fallback → first initial
-            return name[0] + "."
-    
-        except (requests.RequestException, ValueError):
-            return name[0] + "."
+        return self.resolve_entities("name", [name])[name]
 
 
         
     
     def get_name_matches(self):
-        matches = []
-    
-        for i, report in enumerate(self.cleaned_reports):
-            doc = self.nlp(report)
-            for ent in doc.ents:
-                if ent.label_ == "PERSON":
-                    name_text = ent.text.strip()
-                    suggestion = self.get_name_suggestion(name_text)
-    
-                    matches.append({
-                        "report_idx": i,
-                        "original": name_text,
-                        "suggestion": suggestion
-                    })
-        return matches
+        return [match for _, matches in self.iter_name_matches() for match in matches]
+
+    def iter_name_matches(self):
+        """Name matches with their suggestion, yielded per chunk as ((reports done, total), matches)."""
+        def detect(i, report):
+            return [
+                {
+                    "report_idx": i,
+                    "original": ent.text.strip(),
+                    "start_char": ent.start_char,  # offsets in report_text
+                    "end_char": ent.end_char,
+                    "report_text": report,
+                }
+                for ent in self.analysis_for(report)["ents"] if ent.label == "PERSON"
+            ]
+
+        def resolve(items):
+            # resolve every distinct name of the chunk once
+            matches = [match for _, report_matches in items for match in report_matches]
+            suggestions = self.resolve_entities("name", [m["original"] for m in matches])
+            for match in matches:
+                match["suggestion"] = suggestions[match["original"]]
+
+        for progress, items in self.iter_detections("names", detect, resolve):
+            yield progress, [match for _, report_matches in items for match in report_matches]
 
 
 
@@ -822,11 +3274,6 @@ class DreamCruncher:
         if hasattr(self, "apply_places_btn") and self.apply_places_btn.winfo_exists():
             self.apply_places_btn.destroy()
     
-        # Clear any previous Name step widgets
-        if hasattr(self, "name_vars_widgets"):
-            self.clear_name_widgets()
-        self.name_vars_widgets = []
-    
         # Create or show Apply Names button above the context area
         self.apply_names_btn = tk.Button(
             self.root, text="Apply Name Replacements", command=self.apply_name_replacements
@@ -835,119 +3282,212 @@ class DreamCruncher:
         self.apply_names_btn.pack(pady=5, before=self.proceed_frame)
     
         # Clear context area
-        for widget in self.context_area_frame.winfo_children():
-            widget.destroy()
-    
-        # Get all name matches
-        self.name_matches = self.get_name_matches()
-    
-        if not self.name_matches:
-            # No names found → skip to spellcheck
+        self.match_list.clear()
+        self.entity_groups = {}
+    
+        # Get all name matches in the background, rows appear as they are found
+        self.name_matches = []
+        self.start_task(
+            self.iter_name_matches, self.add_name_rows, self.name_matches_done,
+            "Dream Reports Cleaner - Name Anonymization Step"
+        )
+
+    def name_matches_done(self):
+        self.restore_selection()
+        if not len(self.match_list):
+            # No names found (or all applied) → skip to places
             self.apply_names_btn.pack_forget()
             self.start_place_step()
-            return
-    
-        # Build GUI for each name match
-        self.name_vars = []  # (report_idx, original, entry, var)
-        for match in self.name_matches:
-            row = tk.Frame(self.context_area_frame)
-            row.pack(fill="x", pady=2)
-    
-            # Checkbox
-            var = tk.BooleanVar(value=True)
-            chk = tk.Checkbutton(row, variable=var)
-            chk.pack(side="left")
-    
-            # Context preview (±5 words)
-            ctxs = self.get_replace_contexts(
-                self.cleaned_reports[match["report_idx"]],
-                [match["original"]],
-                window=5
-            )
-            context_text = " ... ".join(ctx for _, ctx in ctxs) if ctxs else match["original"]
-            lbl = tk.Label(row, text=f"...{context_text}...")
-            lbl.pack(side="left", padx=5)
-    
-            # Suggestion entry
-            entry = tk.Entry(row, width=20)
-            
-            # apply article immediately
-            entry.insert(0, match["suggestion"])
-            entry.pack(side="left", padx=5)
-            
-            # Save for applying replacements
-            self.name_vars.append({
-                "report_idx": match["report_idx"],
-                "original": match["original"],
-                "entry": entry,
-                "var": var,
-                "row": row  # keep reference to GUI row
-            })
+
+    def add_name_rows(self, matches):
+        # List rows: checkbox, context, editable suggestion
+        self.name_matches += matches
+        self.add_entity_rows(matches, self.get_replace_contexts)
 
 
 
     
-    # apply name replacements
-    def apply_name_replacements(self):
-        if not hasattr(self, "name_vars"):
-            self.start_start_place_step()
-            return
-    
-        still_active = []
-    
-        for match in self.name_vars:
-            if not match["var"].get():  # unchecked → keep in GUI
-                still_active.append(match)
+    def name_replacement_spans(self, report_text, original, role):
+        """(start, end, replacement) for every occurrence of a name in a report."""
+        replacements = []
+        for ent in self.analysis_for(report_text)["ents"]:
+            if ent.label != "PERSON":
                 continue
-    
-            report_idx = match["report_idx"]
-            report_text = self.cleaned_reports[report_idx]
-    
-            doc = self.nlp(report_text)
+            if ent.text != original:
+                continue
+
+            replacements.append((ent.start_char, ent.end_char, self.name_replacement(report_text, ent.start_char, role)))
+        return replacements
+
+    def name_replacement(self, report_text, start_char, role):
+        """The text replacing a name that starts at start_char: an initial or the role with its article."""
+        if len(role) == 2 and role[1] == ".":  # initials like "J."
+            return role
+
+        # Determine if we should capitalize the article
+        capitalize_article = False
+        pre_text = report_text[:start_char].rstrip()
+        if not pre_text or pre_text[-1] in ".!?":
+            capitalize_article = True
+
+        return self.add_article(role, capitalize=capitalize_article, definite=False)
+
+    def apply_name_matches(self, matches):
+        """Replace names with their suggestion, without the GUI."""
+        self.apply_entity_matches("name", [(match, match["suggestion"].strip()) for match in matches])
+
+    def apply_entity_matches(self, kind, decisions):
+        """
+        Apply [(name or place match, replacement)] with the offsets the
+        matches carry, grouped per report into one splice each, without
+        parsing. Only matches whose report was edited since they were
+        found are looked up again (see name/place_replacement_spans).
+        """
+        by_report = {}
+        for match, replacement in decisions:
+            by_report.setdefault(match["report_idx"], []).append((match, replacement))
+
+        for report_idx, report_decisions in by_report.items():
+            text = self.cleaned_reports[report_idx]
             replacements = []
-    
-            # Find entity match in the report
-            for ent in doc.ents:
-                if ent.label_ != "PERSON":
-                    continue
-                if ent.text != match["original"]:
-                    continue
-    
-                role = match["entry"].get().strip()
-                dep = ent.root.dep_
-    
-                if len(role) == 2 and role[1] == ".":  # initials like "J."
-                    repl = role
+            for match, replacement in report_decisions:
+                # the very text the match was found in (ReportDocument keeps it
+                # until the next edit), so its offsets are still valid
+                if match.get("report_text") is text:
+                    start, end = match["start_char"], match["end_char"]
+                    if kind == "name":
+                        replacement = self.name_replacement(text, start, replacement)
+                    else:
+                        replacement = self.add_article(replacement, capitalize=False)
+                    replacements.append((start, end, replacement))
+                elif kind == "name":
+                    replacements += self.name_replacement_spans(text, match["original"], replacement)
                 else:
-                    # Determine if we should capitalize the article
-                    capitalize_article = False
-                    pre_text = report_text[:ent.start_char].rstrip()
-                    if not pre_text or pre_text[-1] in ".!?":
-                        capitalize_article = True
-    
-                    repl = self.add_article(role, capitalize=capitalize_article, definite=False)
-    
-                replacements.append((ent.start_char, ent.end_char, repl))
-    
-            # Apply replacements from end → start to not break offsets
-            replacements.sort(reverse=True)
-            for start, end, repl in replacements:
-                old_text = report_text[start:end]
-                report_text = report_text[:start] + repl + report_text[end:]
-                
-                # Track change
-                self.changes[report_idx].append((start, start+len(repl), old_text, repl, "name"))
-    
-            self.cleaned_reports[report_idx] = report_text
-    
-            # Remove the row from GUI
-            match["row"].destroy()
-    
-        # Keep only unreplaced matches
-        self.name_vars = [m for m in still_active if m["var"].get() is False]
+                    replacements += self.place_replacement_spans(text, match["original"], replacement)
+            self.apply_replacements(report_idx, replacements, kind)
+
+    # ---------- grouped entity review ----------
+    @staticmethod
+    def group_entity_matches(matches, groups=None):
+        """
+        Collapse name or place matches by their normalized text (see
+        LookupCache.normalize) into {key: group}, extending `groups` if
+        given. A group has the key, the first spelling as original, all
+        spellings as variants, the suggestion, its matches and reports
+        ({report_idx: occurrences}).
+        """
+        groups = {} if groups is None else groups
+        for match in matches:
+            key = LookupCache.normalize(match["original"])
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    "key": key,
+                    "original": match["original"],
+                    "variants": set(),
+                    "suggestion": match["suggestion"],
+                    "matches": [],
+                    "reports": {},
+                }
+            group["variants"].add(match["original"])
+            group["matches"].append(match)
+            group["reports"][match["report_idx"]] = group["reports"].get(match["report_idx"], 0) + 1
+        return groups
+
+    def add_entity_rows(self, matches, get_contexts):
+        """
+        List rows for name or place matches: one per occurrence, or with
+        "Group by entity" one per distinct entity with its number of
+        occurrences and a few sample contexts. Groups that are already
+        listed are updated when more of their matches arrive.
+        """
+        if not self.group_var.get():
+            rows = []
+            for match in matches:
+                # Context preview (±5 words)
+                ctxs = get_contexts(self.cleaned_reports[match["report_idx"]], [match["original"]], window=5)
+                context_text = " ... ".join(ctx for _, ctx in ctxs) if ctxs else match["original"]
+                rows.append((match["report_idx"], f"...{context_text}...", match["suggestion"], match))
+            self.match_list.add_rows(rows)
+            return
+
+        listed = set(self.entity_groups)
+        self.group_entity_matches(matches, self.entity_groups)
+        rows = []
+        for key in dict.fromkeys(LookupCache.normalize(m["original"]) for m in matches):
+            group = self.entity_groups[key]
+            samples = group.setdefault("contexts", [])
+            if len(samples) < 3:  # a context from each of the first three reports
+                samples.clear()
+                for report_idx in itertools.islice(group["reports"], 3):
+                    ctxs = get_contexts(self.cleaned_reports[report_idx], group["variants"], window=5)
+                    samples.append(ctxs[0][1] if ctxs else group["original"])
+
+            count = len(group["matches"])
+            context_text = (
+                f"{count}× in {len(group['reports'])} report(s): "
+                + " | ".join(f"...{ctx}..." for ctx in samples)
+            )
+            if key in listed:
+                self.match_list.update_context(group, context_text)
+            else:
+                rows.append((None, context_text, group["suggestion"], group))
+        self.match_list.add_rows(rows)
+
+    def apply_entity_rows(self, kind):
+        """Apply the checked rows of the name or place list, groups to all their reports."""
+        decisions = []
+        for item, replacement in self.match_list.selected_rows():
+            if "reports" in item:  # a group
+                decisions += [(match, replacement.strip()) for match in item["matches"]]
+                self.entity_groups.pop(item["key"], None)  # later matches start a new group
+            else:
+                decisions.append((item, replacement.strip()))
+        # all rows at once, one splice per report
+        self.apply_entity_matches(kind, decisions)
+
+        # Keep only unreplaced (unchecked) matches in the list
+        self.match_list.keep_unselected()
+
+    def regroup_entities(self):
+        """
+        Switch the name or place list between per-occurrence and grouped
+        rows, keeping the typed replacement and checkbox of each entity. A
+        group is checked only if all its occurrences were and takes the
+        replacement of the first one.
+        """
+        if self.step not in (1, 2):
+            return
+
+        def entity_key(item):
+            return item["key"] if "reports" in item else LookupCache.normalize(item["original"])
+
+        matches = []
+        kept = {}  # entity key -> (checked, replacement)
+        rows = self.match_list
+        for item, checked, value in zip(rows.items, rows.selected, rows.values):
+            matches += item["matches"] if "reports" in item else [item]
+            key = entity_key(item)
+            if key in kept:
+                kept[key] = (kept[key][0] and checked, kept[key][1])
+            else:
+                kept[key] = (checked, value)
+
+        self.entity_groups = {}
+        rows.clear()
+        get_contexts = self.get_replace_contexts if self.step == 1 else self.get_place_contexts
+        self.add_entity_rows(matches, get_contexts)
+        for k, item in enumerate(rows.items):
+            if entity_key(item) in kept:
+                rows.selected[k], rows.values[k] = kept[entity_key(item)]
+        rows.refresh()
+
+    # apply name replacements
+    def apply_name_replacements(self):
+        self.apply_entity_rows("name")
     
         # If no more names left, hide button and proceed
-        if not self.name_vars:
+        if not len(self.match_list) and self.task is None:
             self.apply_names_btn.pack_forget()
             self.start_place_step()
 
@@ -974,73 +3514,40 @@ class DreamCruncher:
 
 
         
-    def clear_name_widgets(self):
-        for widget in getattr(self, "name_vars_widgets", []):
-            widget.destroy()
-        self.name_vars_widgets = []
-        
     # match places
     def get_place_matches(self):
-        matches = []
-        for i, report in enumerate(self.cleaned_reports):
-            doc = self.nlp(report)
-            for ent in doc.ents:
-                if ent.label_ in {"GPE", "LOC", "FAC"}:
-                    suggestion = self.get_place_suggestion(ent.text)
-                    matches.append({
-                        "report_idx": i,
-                        "original": ent.text,
-                        "suggestion": suggestion
-                    })
-        return matches
+        return [match for _, matches in self.iter_place_matches() for match in matches]
 
-    @staticmethod
-    def get_place_suggestion(place_name):
+    def iter_place_matches(self):
+        """Place matches with their suggestion, yielded per chunk as ((reports done, total), matches)."""
+        def detect(i, report):
+            return [
+                {
+                    "report_idx": i,
+                    "original": ent.text,
+                    "start_char": ent.start_char,  # offsets in report_text
+                    "end_char": ent.end_char,
+                    "report_text": report,
+                }
+                for ent in self.analysis_for(report)["ents"] if ent.label in {"GPE", "LOC", "FAC"}
+            ]
+
+        def resolve(items):
+            # resolve every distinct place of the chunk once
+            matches = [match for _, report_matches in items for match in report_matches]
+            suggestions = self.resolve_entities("place", [m["original"] for m in matches])
+            for match in matches:
+                match["suggestion"] = suggestions[match["original"]]
+
+        for progress, items in self.iter_detections("places", detect, resolve):
+            yield progress, [match for _, report_matches in items for match in report_matches]
+
+    def get_place_suggestion(self, place_name):
         """
         Look up a place on Wikidata and suggest a type like 'city', 'river', 'country', 'monument'.
         Fallback: 'place'
         """
-        search_url = "https://www.wikidata.org/w/api.php"
-        params = {
-            "action": "wbsearchentities",
-            "search": place_name,
-            "language": "en",
-            "limit": 1,
-            "format": "json"
-        }
-        headers = {"User-Agent": "Python"}
-        
-        try:
-            response = requests.get(search_url, headers=headers, params=params, timeout=5)
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data.get("search"):
-                return "place"
-            
-            description = data["search"][0].get("description", "").lower()
-
-            place_keywords = {
-                "city": ["city", "cities", "megacity", "megacities", "metropolis", "urban area", "municipality"],
-                "town": ["town", "towns", "village", "villages"],
-                "country": ["country", "nation"],
-                "state": ["state", "states", "province", "provinces", "canton", "cantons", "governorate"],
-                "river": ["river", "rivers", "stream", "creek"],
-                "lake": ["lake", "lakes", "reservoir", "pond"],
-                "ocean": ["sea", "seas", "ocean", "oceans", "coast", "costal", "gulf", "bay"],
-                "landmark": ["monument", "building", "structure",
-                             "landmark", "tower", "statue", "temple", 
-                             "cathedral", "church", "mosque", "castle", "fort"],
-            }
-        
-            for place_type, keywords in place_keywords.items():
-                if any(keyword in description for keyword in keywords):
-                    return place_type
-        
-            return "place"
-            
-        except (requests.RequestException, ValueError):
-            return "place"
+        return self.resolve_entities("place", [place_name])[place_name]
 
     
     def start_place_step(self):
@@ -1053,16 +3560,8 @@ class DreamCruncher:
             self.apply_names_btn.destroy()
         
         # Clear previous context widgets
-        for widget in self.context_area_frame.winfo_children():
-            widget.destroy()
-        
-        # Get place matches
-        self.place_matches = self.get_place_matches()
-        
-        if not self.place_matches:
-            # Skip to spellcheck if nothing found
-            self.start_spellcheck()
-            return
+        self.match_list.clear()
+        self.entity_groups = {}
         
         # Create Apply Places button
         self.apply_places_btn = tk.Button(
@@ -1070,95 +3569,71 @@ class DreamCruncher:
         )
         self.apply_places_btn.pack(pady=5, before=self.proceed_frame)
         
-        # Build GUI for each match
-        self.place_vars = []
-        for match in self.place_matches:
-            row = tk.Frame(self.context_area_frame)
-            row.pack(fill="x", pady=2)
-            
-            # Checkbox
-            var = tk.BooleanVar(value=True)
-            chk = tk.Checkbutton(row, variable=var)
-            chk.pack(side="left")
-            
-            # Context preview ±5 words
-            ctxs = self.get_place_contexts(
-                self.cleaned_reports[match["report_idx"]],
-                [match["original"]],
-                window=5
-            )
-            context_text = " ... ".join(ctx for _, ctx in ctxs) if ctxs else match["original"]
-            lbl = tk.Label(row, text=f"...{context_text}...")
-            lbl.pack(side="left", padx=5)
-            
-            # Suggestion entry
-            entry = tk.Entry(row, width=20)
-            entry.insert(0, match["suggestion"])
-            entry.pack(side="left", padx=5)
-            
-            self.place_vars.append({
-                "report_idx": match["report_idx"],
-                "original": match["original"],
-                "entry": entry,
-                "var": var,
-                "row": row
-            })
+        # Get place matches in the background, rows appear as they are found
+        self.place_matches = []
+        self.start_task(
+            self.iter_place_matches, self.add_place_rows, self.place_matches_done,
+            "Place Anonymization"
+        )
 
-            
-    def apply_place_replacements(self):
-        if not hasattr(self, "place_vars"):
+    def place_matches_done(self):
+        self.restore_selection()
+        if not len(self.match_list):
+            # Skip to spellcheck if nothing found (or all applied)
+            self.apply_places_btn.destroy()
             self.start_spellcheck()
-            return
-        
-        still_active = []
-        
-        for match in self.place_vars:
-            if not match["var"].get():
-                still_active.append(match)
-                continue
-            
-            report_idx = match["report_idx"]
-            text = self.cleaned_reports[report_idx]
-            doc = self.nlp(text)
-            replacements = []
-            
-            # Find matching entity in doc
-            for ent in doc.ents:
-                if ent.label_ not in {"GPE", "LOC", "FAC"}:
-                    continue
-                if ent.text != match["original"]:
-                    continue
-                repl = self.add_article(match["entry"].get().strip(), capitalize=False)
-                replacements.append((ent.start_char, ent.end_char, repl))
-            
-            # Apply replacements end → start
-            replacements.sort(reverse=True)
-            for start, end, repl in replacements:
-                old_text = text[start:end]
-                text = text[:start] + repl + text[end:]
-                self.changes[report_idx].append((start, start+len(repl), old_text, repl, "place"))
+
+    def add_place_rows(self, matches):
+        # List rows: checkbox, context, editable suggestion
+        self.place_matches += matches
+        self.add_entity_rows(matches, self.get_place_contexts)
+
             
-            self.cleaned_reports[report_idx] = text
-            match["row"].destroy()
-        
-        # Keep only unchecked
-        self.place_vars = [m for m in still_active if not m["var"].get()]
+    def place_replacement_spans(self, report_text, original, place_type):
+        """(start, end, replacement) for every occurrence of a place in a report."""
+        replacements = []
+        for ent in self.analysis_for(report_text)["ents"]:
+            if ent.label not in {"GPE", "LOC", "FAC"}:
+                continue
+            if ent.text != original:
+                continue
+            repl = self.add_article(place_type, capitalize=False)
+            replacements.append((ent.start_char, ent.end_char, repl))
+        return replacements
+
+    def apply_place_matches(self, matches):
+        """Replace places with their suggestion, without the GUI."""
+        self.apply_entity_matches("place", [(match, match["suggestion"].strip()) for match in matches])
+
+    def apply_place_replacements(self):
+        self.apply_entity_rows("place")
         
-        if not self.place_vars:
+        if not len(self.match_list) and self.task is None:
             self.apply_places_btn.destroy()
             self.start_spellcheck()
             
     def get_place_contexts(self, report, targets, window=5):
-        doc = self.nlp(report)
+        analysis = self.analysis_for(report)
         contexts = []
     
-        for ent in doc.ents:
+        for ent in analysis["ents"]:
             if ent.text in targets:
-                start_token = max(ent.start - window, 0)
-                end_token = min(ent.end + window, len(doc))
-                context_tokens = [t.text for t in doc[start_token:ent.start]]  # before entity
-                context_tokens.append(f"[{ent.text}]")                          # entity itself
-                context_tokens += [t.text for t in doc[ent.end:end_token]]      # after entity
-                contexts.append((ent.text, " ".join(context_tokens)))
+                contexts.append((ent.text, self.entity_context(analysis, ent, window)))
         
-        return contexts
\ No newline at end of file
+        return contexts
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build an offline gazetteer from a Wikidata JSON dump.")
+    parser.add_argument("dump", help="Wikidata JSON dump (.json, .json.gz, .json.bz2) or fixture")
+    parser.add_argument("output", help="gazetteer file to write")
+    parser.add_argument("--min-sitelinks", type=int, default=0,
+                        help="keep only entities known to at least this many Wikimedia sites")
+    parser.add_argument("--language", default="en")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    gazetteer = Gazetteer.build(args.dump, args.output, args.min_sitelinks, args.language)
+    print(f"Wrote {len(gazetteer)} labels to {args.output} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,57 @@
+import spacy
+
+from dreamcruncher import DreamCruncher
+
+
+def make_cruncher(reports):
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([
+        {"label": "PERSON", "pattern": "Anna"},
+        {"label": "GPE", "pattern": "Paris"},
+    ])
+    cruncher = DreamCruncher(reports, [], gui=False, lookup_cache_path=":memory:")
+    cruncher.nlp = nlp
+    return cruncher
+
+
+def match(cruncher, i, original):
+    text = cruncher.cleaned_reports[i]
+    start = text.index(original)
+    return {"report_idx": i, "original": original, "start_char": start, "end_char": start + len(original),
+            "report_text": text, "suggestion": "A."}
+
+
+def count_lookups(cruncher):
+    lookups = []
+    analysis_for = cruncher.analysis_for
+    cruncher.analysis_for = lambda text: lookups.append(text) or analysis_for(text)
+    return lookups
+
+
+def test_offsets_of_the_same_text_are_applied_without_parsing():
+    cruncher = make_cruncher(["Yesterday Anna was in Paris."])
+    name, place = match(cruncher, 0, "Anna"), match(cruncher, 0, "Paris")
+    lookups = count_lookups(cruncher)
+
+    cruncher.apply_entity_matches("name", [(name, "A.")])
+    assert cruncher.cleaned_reports[0] == "Yesterday A. was in Paris."
+    assert lookups == []
+
+    # the first edit made a new text, so the place is looked up again
+    cruncher.apply_entity_matches("place", [(place, "city")])
+    assert cruncher.cleaned_reports[0] == "Yesterday A. was in a city."
+    assert lookups == ["Yesterday A. was in Paris."]
+
+
+def test_equal_but_rebuilt_text_is_looked_up_again():
+    cruncher = make_cruncher(["Anna met Anna."])
+    stale = match(cruncher, 0, "Anna")
+    cruncher.cleaned_reports[0] = "Anna met Anna!"
+    cruncher.cleaned_reports[0] = "Anna met Anna."  # equal to the matched text, but a new string
+    assert stale["report_text"] == cruncher.cleaned_reports[0]
+    assert stale["report_text"] is not cruncher.cleaned_reports[0]
+    lookups = count_lookups(cruncher)
+
+    cruncher.apply_entity_matches("name", [(stale, "teacher")])
+    assert lookups == ["Anna met Anna."]
+    assert cruncher.cleaned_reports[0] == "A teacher met a teacher."
@@ -0,0 +1,72 @@
+import json
+
+import pandas as pd
+
+from dreamcruncher import ChangeTable, ReportDocument
+
+
+def reference_changes(original_reports, cleaned_reports, changes, context_window=10):
+    """The tracked_changes DataFrame as changes_to_dataframe built it before ChangeTable."""
+    rows = []
+    for i, report_changes in changes.items():
+        original = original_reports[i]
+        for start, end, old_text, new_text, change_type in report_changes:
+            context = original[max(0, start - context_window):min(len(original), end + context_window)]
+            rows.append({
+                "report_idx": i,
+                "original_report": original,
+                "cleaned_report": cleaned_reports[i],
+                "change_type": change_type,
+                "old_text": old_text,
+                "new_text": new_text,
+                "context": context.replace("\n", " "),
+            })
+    return pd.DataFrame(rows)
+
+
+def edited_reports():
+    originals = ["I saw Peter in Paris.", "Nothing here.", "A long\nreport about Anna and teh sea."]
+    documents = [ReportDocument(report) for report in originals]
+    documents[0].replace([(6, 11, "P."), (15, 20, "a city")], "names")
+    documents[2].replace([(29, 32, "the")], "spellcheck")
+    documents[2].replace([(20, 24, "A.")], "names")
+    changes = {i: doc.journal for i, doc in enumerate(documents)}
+    return originals, [doc.text for doc in documents], changes
+
+
+def test_wide_frame_matches_the_previous_columns():
+    originals, cleaned, changes = edited_reports()
+    table = ChangeTable(originals, cleaned, changes)
+
+    expected = reference_changes(originals, cleaned, changes)
+    pd.testing.assert_frame_equal(table.to_dataframe(wide=True), expected)
+    assert len(table) == 4
+
+
+def test_compact_frame_has_offsets_instead_of_reports():
+    originals, cleaned, changes = edited_reports()
+    df = ChangeTable(originals, cleaned, changes, offset=100).to_dataframe()
+
+    assert list(df.columns) == list(ChangeTable.COLUMNS)
+    wide = reference_changes(originals, cleaned, changes)
+    assert list(df["report_idx"]) == [i + 100 for i in wide["report_idx"]]
+    assert list(df["change_type"].astype(str)) == list(wide["change_type"])
+    assert list(df["old_text"]) == list(wide["old_text"])
+    assert list(df["context"]) == list(wide["context"])
+    assert list(zip(df["start"], df["end"])) == [change[:2] for i in sorted(changes) for change in changes[i]]
+
+
+def test_no_changes():
+    assert ChangeTable(["a"], ["a"], {0: []}).to_dataframe(wide=True).empty
+    assert list(ChangeTable(["a"], ["a"], {0: []}).to_dataframe().columns) == list(ChangeTable.COLUMNS)
+
+
+def test_write_jsonl_and_reports_once(tmp_path):
+    originals, cleaned, changes = edited_reports()
+    ChangeTable(originals, cleaned, changes).write(tmp_path / "changes.jsonl", tmp_path / "reports.csv")
+
+    rows = [json.loads(line) for line in (tmp_path / "changes.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [row["old_text"] for row in rows] == ["Paris", "Peter", "teh", "Anna"]
+    reports = pd.read_csv(tmp_path / "reports.csv")
+    assert list(reports["report_idx"]) == [0, 2]
+    assert list(reports["cleaned_report"]) == [cleaned[0], cleaned[2]]
@@ -0,0 +1,77 @@
+import spacy
+
+from dreamcruncher import DreamCruncher, ReportResults
+
+
+def make_cruncher(reports):
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "PERSON", "pattern": "Anna"}])
+    cruncher = DreamCruncher(reports, [], gui=False, lookup_cache_path=":memory:")
+    cruncher.nlp = nlp
+    return cruncher
+
+
+def run(cruncher, calls, chunk_size=2):
+    def detect(i, text):
+        calls.append(i)
+        return [ent.text for ent in cruncher.analysis_for(text)["ents"]]
+
+    return list(cruncher.iter_detections("names", detect, chunk_size=chunk_size))
+
+
+def test_only_dirty_reports_are_detected_again():
+    reports = ["Anna", "nobody", "Anna again", "nobody", "and Anna", "nobody"]
+    cruncher = make_cruncher(reports)
+    calls = []
+    chunks = run(cruncher, calls)
+    assert calls == [0, 1, 2, 3, 4, 5]
+    assert [progress for progress, _ in chunks] == [(2, 6), (4, 6), (6, 6)]
+    assert [item for _, items in chunks for item in items] == [(0, ["Anna"]), (2, ["Anna"]), (4, ["Anna"])]
+
+    cruncher.cleaned_reports[3] = "Anna"
+    cruncher.cleaned_reports[4] = "nobody"
+    calls.clear()
+    chunks = run(cruncher, calls)
+    assert calls == [3, 4]
+    # kept results merged in report order, up to the end of each chunk
+    assert [items for _, items in chunks] == [[(0, ["Anna"]), (2, ["Anna"]), (3, ["Anna"])]]
+
+    calls.clear()
+    chunks = run(cruncher, calls)
+    assert calls == []
+    assert chunks == [((0, 0), [(0, ["Anna"]), (2, ["Anna"]), (3, ["Anna"])])]
+
+
+def test_one_pipe_pass_for_all_chunks():
+    cruncher = make_cruncher([f"Anna {i}" for i in range(10)])
+    pipe = cruncher.nlp.pipe
+    passes = []
+    cruncher.nlp.pipe = lambda texts, **kwargs: passes.append(kwargs) or pipe(texts, **kwargs)
+
+    chunks = run(cruncher, [], chunk_size=3)
+    assert len(chunks) == 4
+    assert len(passes) == 1
+
+
+def test_result_of_a_report_edited_meanwhile_is_not_stored():
+    cruncher = make_cruncher(["Anna", "Anna"])
+    calls = []
+
+    def detect(i, text):
+        calls.append(i)
+        if i == 0:
+            cruncher.cleaned_reports[0] = "nobody"  # an edit from the GUI thread
+        return [ent.text for ent in cruncher.analysis_for(text)["ents"]]
+
+    list(cruncher.iter_detections("names", detect))
+    store = cruncher.detections["names"]
+    assert store.dirty == {0}
+    assert store.results == {1: ["Anna"]}
+
+
+def test_set_if_unchanged():
+    store = ReportResults(2)
+    assert store.set_if_unchanged(0, ["x"], lambda: "text", "text")
+    assert not store.set_if_unchanged(1, ["y"], lambda: "edited", "text")
+    assert store.results == {0: ["x"]}
+    assert store.dirty == {1}
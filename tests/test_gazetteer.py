@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from dreamcruncher import DreamCruncher, Gazetteer, iter_wikidata_entities
+
+
+def entity(qid, label, description, instance_of, sitelinks=0, aliases=(), claims=()):
+    return {
+        "id": qid,
+        "labels": {"en": {"language": "en", "value": label}},
+        "descriptions": {"en": {"language": "en", "value": description}},
+        "aliases": {"en": [{"language": "en", "value": alias} for alias in aliases]},
+        "claims": {prop: [{"mainsnak": {"datavalue": {"value": {"id": value}}}, "rank": "normal"}]
+                   for prop, value in [("P31", instance_of), *claims]},
+        "sitelinks": {f"site{i}": {} for i in range(sitelinks)},
+    }
+
+
+ENTITIES = [
+    entity("Q2263", "Tom Hanks", "American actor", "Q5", 120, aliases=["Tom", "Thomas Jeffrey Hanks"],
+           claims=[("P106", "Q33999")]),
+    entity("Q3354498", "Tom", "male given name", "Q12308941", 3),
+    entity("Q90", "Paris", "capital city of France", "Q515", 300, claims=[("P625", "Q0")]),
+    entity("Q830149", "Paris", "city in Texas, United States", "Q515", 20, claims=[("P625", "Q0")]),
+    entity("Q1", "Obscure Person", "Swiss baker", "Q5", 1, claims=[("P106", "Q0")]),
+]
+
+
+@pytest.fixture
+def dump(tmp_path):
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps(ENTITIES), encoding="utf-8")  # the whole array on one line
+    return path
+
+
+def test_single_line_array_yields_entities(dump):
+    assert [e["id"] for e in iter_wikidata_entities(str(dump))] == [e["id"] for e in ENTITIES]
+
+
+def test_lookups(dump, tmp_path):
+    gazetteer = Gazetteer.build(str(dump), str(tmp_path / "gazetteer.bin"))
+    assert gazetteer.get("name", "tom hanks") == "american actor"
+    assert gazetteer.get("name", "Thomas Jeffrey Hanks") == "american actor"
+    assert gazetteer.get("place", "Paris") == "capital city of france"  # most sitelinks
+    assert gazetteer.get("name", "Paris") is None
+    assert gazetteer.get("place", "Atlantis") is None
+    assert not (tmp_path / "gazetteer.bin.build.sqlite").exists()
+    gazetteer.close()
+
+
+def test_lone_first_name_is_not_a_namesake(dump, tmp_path):
+    gazetteer = Gazetteer.build(str(dump), str(tmp_path / "gazetteer.bin"), min_sitelinks=10)
+    assert gazetteer.get("name", "Tom") == "male given name"  # kept despite min_sitelinks
+    gazetteer.close()
+
+    cruncher = DreamCruncher(["a report"], [], gui=False, lookup_cache_path=":memory:",
+                             gazetteer_path=str(tmp_path / "gazetteer.bin"))
+    assert cruncher.resolve_entities("name", ["Tom"]) == {"Tom": "T."}
+
+
+def test_min_sitelinks(dump, tmp_path):
+    gazetteer = Gazetteer.build(str(dump), str(tmp_path / "gazetteer.bin"), min_sitelinks=10)
+    assert gazetteer.get("name", "Obscure Person") is None
+    assert gazetteer.get("place", "Paris") == "capital city of france"
+    assert len(gazetteer) == 4  # tom hanks, thomas jeffrey hanks, tom, paris
+    gazetteer.close()
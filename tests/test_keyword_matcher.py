@@ -0,0 +1,26 @@
+from dreamcruncher import DreamCruncher, KeywordMatcher
+
+
+def analysis(words, lemmas):
+    offsets, pos = [], 0
+    for word in words:
+        offsets.append(pos)
+        pos += len(word) + 1
+    return {"tokens": words, "offsets": offsets, "lemmas": lemmas}
+
+
+def test_phrases_of_raw_and_normalized_lemma_are_both_tried():
+    matcher = KeywordMatcher(
+        {("dreams",): "dreams", ("dream", "walk"): "dream walk"}, normalize=DreamCruncher.normalize_word
+    )
+    text = "dreams walk"
+    hits = matcher.matches(analysis(["dreams", "walk"], ["dreams", "walk"]), text)
+    assert hits == [(0, 11, "dream walk")]
+
+
+def test_literal_keywords_and_exceptions():
+    matcher = KeywordMatcher({("be",): "was", ("fly",): "flying"}, ["...", "(?)"], exceptions={"be"})
+    text = "I was flying... (?)"
+    words = ["I", "was", "flying", "...", "(?)"]
+    hits = matcher.matches(analysis(words, ["i", "be", "fly", "...", "(?)"]), text)
+    assert hits == [(6, 12, "flying"), (12, 15, "..."), (16, 19, "(?)")]
@@ -0,0 +1,48 @@
+import re
+
+import pytest
+
+from dreamcruncher import MultiPattern
+
+
+def matches(patterns, text, **kwargs):
+    return list(MultiPattern(patterns, **kwargs).finditer(text))
+
+
+def test_literal_patterns_match_whole_words_longest_first():
+    patterns = {"new york": "a city", "new": "old"}
+    assert matches(patterns, "New York is new") == [(0, 8, "a city"), (12, 15, "old")]
+
+
+def test_regex_group_references_in_replacement():
+    assert matches({r"site (\d+)": r"S\1"}, "site 12", regex=True) == [(0, 7, "S12")]
+
+
+def test_lone_backreference():
+    assert matches({r"(\w)\1": r"<\1>"}, "book keeper", regex=True) == [(1, 3, "<o>"), (6, 8, "<e>")]
+
+
+def test_backreference_after_other_patterns():
+    patterns = {"foo": "bar", r"(a)\1": "A", r"site (\d+)": r"S\1"}
+    assert matches(patterns, "aa foo site 12", regex=True) == [
+        (0, 2, "A"), (3, 6, "bar"), (7, 14, "S12"),
+    ]
+
+
+def test_same_group_name_in_two_patterns():
+    patterns = {r"(?P<n>\d+)kg": r"\g<n> kg", r"(?P<n>\d+)cm": r"\g<n> cm", r"(?P<n>x)(?P=n)": "X"}
+    assert matches(patterns, "5kg and 7cm xx", regex=True) == [
+        (0, 3, "5 kg"), (8, 11, "7 cm"), (12, 14, "X"),
+    ]
+
+
+def test_conditional_group_and_leading_flags():
+    patterns = {"x": "y", r"(?i)(A)?b(?(1)c|d)": "Z"}
+    assert matches(patterns, "x Abc bd bc", regex=True, ignore_case=False) == [
+        (0, 1, "y"), (2, 5, "Z"), (6, 8, "Z"),
+    ]
+
+
+def test_invalid_regex_raises():
+    with pytest.raises(re.error):
+        MultiPattern({"(unclosed": "x"}, regex=True)
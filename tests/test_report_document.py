@@ -0,0 +1,58 @@
+import pickle
+
+from dreamcruncher import DreamCruncher, ReportDocument
+
+
+def replay(original, journal):
+    """Apply journal entries one after the other, as an export would."""
+    text = original
+    for start, end, old_text, new_text, _ in journal:
+        assert text[start:start + len(old_text)] == old_text
+        text = text[:start] + new_text + text[start + len(old_text):]
+        assert text[start:end] == new_text
+    return text
+
+
+def test_replace_splices_spans_and_journals_them():
+    doc = ReportDocument("I saw Peter and Paul in Rome.")
+    applied = doc.replace([(24, 28, "the city"), (6, 11, "P."), (16, 20, "")], "manual")
+
+    assert applied == [(6, 11, "P."), (16, 20, ""), (24, 28, "the city")]
+    assert doc.text == "I saw P. and  in the city."
+    assert [entry[2:4] for entry in doc.journal] == [("Rome", "the city"), ("Paul", ""), ("Peter", "P.")]
+    assert replay(doc.original, doc.journal) == doc.text
+
+
+def test_replace_skips_overlapping_spans():
+    doc = ReportDocument("abcdef")
+    applied = doc.replace([(1, 4, "X"), (2, 3, "Y"), (3, 5, "Z"), (5, 6, "W")], "manual")
+
+    assert applied == [(1, 4, "X"), (5, 6, "W")]
+    assert doc.text == "aXeW"
+    assert doc.replace([], "manual") == []
+    assert len(doc.journal) == 2
+
+
+def test_repeated_edits_replay_from_the_original():
+    doc = ReportDocument("one two three")
+    doc.replace([(4, 7, "2")], "names")
+    doc.replace([(0, 3, "1"), (6, 11, "3")], "places")
+    doc.replace([(2, 3, "+")], "manual")
+
+    assert doc.text == "1 + 3"
+    assert len(doc) == len(doc.text)
+    assert replay(doc.original, doc.journal) == doc.text
+    assert [entry[4] for entry in doc.journal] == ["names", "places", "places", "manual"]
+
+
+def test_cleaned_reports_behave_like_a_list():
+    cruncher = DreamCruncher(["a report", "another"], [], gui=False, lookup_cache_path=":memory:")
+    cruncher.cleaned_reports[-1] = "edited"
+    reports = cruncher.cleaned_reports
+
+    assert reports == ["a report", "edited"]
+    assert reports + ["more"] == ["a report", "edited", "more"]
+    assert ["first"] + reports == ["first", "a report", "edited"]
+    assert pickle.loads(pickle.dumps(reports)) == ["a report", "edited"]
+    assert type(pickle.loads(pickle.dumps(reports))) is list
+    assert cruncher.changes[1] == [(0, 6, "another", "edited", "manual")]
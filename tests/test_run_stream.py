@@ -0,0 +1,53 @@
+import pandas as pd
+import spacy
+
+from dreamcruncher import DreamCruncher
+
+
+REPORTS = [
+    "I had a doughnut (?)",
+    "nothing",
+    "one doughnut, two",
+    "a doughnut...",
+    "the end (?)",
+]
+
+
+def test_chunks_keep_report_offsets_and_flags(tmp_path):
+    model = tmp_path / "model"
+    spacy.blank("en").to_disk(model)
+    output, changes_output = tmp_path / "cleaned.csv", tmp_path / "changes.csv"
+
+    n = DreamCruncher.run_stream(
+        REPORTS, str(output), keywords=["(?)", "..."], steps=("replace", "keywords"),
+        replacements={"doughnut": "donut"}, changes_output=str(changes_output), chunk_size=2,
+        model=str(model), lookup_cache_path=":memory:",
+    )
+    assert n == 5
+
+    cleaned = pd.read_csv(output)
+    assert list(cleaned["report_idx"]) == [0, 1, 2, 3, 4]
+    assert list(cleaned["cleaned_report"]) == [report.replace("doughnut", "donut") for report in REPORTS]
+    assert list(cleaned["flagged"]) == [True, False, False, True, True]
+
+    changes = pd.read_csv(changes_output)
+    assert list(changes["report_idx"]) == [0, 2, 3]
+    for _, change in changes.iterrows():
+        report = REPORTS[change["report_idx"]]
+        assert (change["old_text"], change["new_text"]) == ("doughnut", "donut")
+        assert report[change["start"]:change["start"] + len("doughnut")] == "doughnut"
+        assert change["end"] == change["start"] + len("donut")
+
+
+def test_reports_from_a_jsonl_file(tmp_path):
+    source = tmp_path / "reports.jsonl"
+    pd.DataFrame({"text": REPORTS}).to_json(source, orient="records", lines=True)
+    output = tmp_path / "cleaned.jsonl"
+
+    n = DreamCruncher.run_stream(str(source), str(output), steps=("replace",), replacements={"end": "start"},
+                                 chunk_size=3, column="text", lookup_cache_path=":memory:")
+    assert n == 5
+    cleaned = pd.read_json(output, lines=True)
+    assert list(cleaned["report_idx"]) == [0, 1, 2, 3, 4]
+    assert cleaned["cleaned_report"].iloc[4] == "the start (?)"
+    assert "flagged" not in cleaned
@@ -0,0 +1,58 @@
+import io
+import pickle
+import zlib
+
+import pytest
+import spacy
+
+from dreamcruncher import DocCache, DreamCruncher, Entity, SessionLog
+
+
+def make_cruncher(reports, path, **kwargs):
+    return DreamCruncher(reports, [], gui=False, lookup_cache_path=":memory:", checkpoint_path=path, **kwargs)
+
+
+def test_existing_checkpoint_is_not_overwritten(tmp_path):
+    path = tmp_path / "session.ckpt"
+    make_cruncher(["a report"], path).close_checkpoint()
+    size = path.stat().st_size
+
+    with pytest.raises(FileExistsError):
+        make_cruncher(["another report"], path)
+    assert path.stat().st_size == size
+
+    make_cruncher(["another report"], path, overwrite_checkpoint=True).close_checkpoint()
+    assert next(SessionLog.read(path))[1]["reports"] == ["another report"]
+
+
+class BuiltinsOnly(pickle.Unpickler):
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"{module}.{name} in a checkpoint")
+
+
+def test_checkpoint_holds_only_builtin_types(tmp_path):
+    path = tmp_path / "session.ckpt"
+    nlp = spacy.blank("en")
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "PERSON", "pattern": "Anna"}])
+
+    cruncher = make_cruncher(["I met Anna.", "Nobody"], path)
+    cruncher.nlp = nlp
+    cruncher.analyze_reports()
+    cruncher.set_report(1, "Nobody at all", "manual")
+    cruncher.close_checkpoint()
+
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos < len(data):
+        size = SessionLog.HEADER.unpack_from(data, pos)[0]
+        pos += SessionLog.HEADER.size
+        BuiltinsOnly(io.BytesIO(zlib.decompress(data[pos:pos + size]))).load()
+        pos += size
+
+    resumed = DreamCruncher.resume(path, gui=False, lookup_cache_path=":memory:")
+    assert list(resumed.cleaned_reports) == ["I met Anna.", "Nobody at all"]
+    ents = resumed.analyses[DocCache.key("I met Anna.")]["ents"]
+    assert ents == [Entity("Anna", "PERSON", 2, 3, 6, 10)]
+    assert isinstance(ents[0], Entity)
+    resumed.close_checkpoint()
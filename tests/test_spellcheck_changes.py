@@ -0,0 +1,40 @@
+from dreamcruncher import DreamCruncher, diff_spans
+
+
+REPORT = "I had a dream.\nIt was  missspelled here.\n\nThe end."
+
+
+def test_one_change_per_corrected_word_in_multiline_report():
+    cruncher = DreamCruncher([REPORT], [], gui=False, lookup_cache_path=":memory:", spell_workers=0)
+    cruncher.set_report(0, cruncher.correct_spelling(REPORT), "spellcheck")
+
+    assert cruncher.cleaned_reports[0] == "I had a dream.\nIt was  misspelled here.\n\nThe end."
+    start = REPORT.index("missspelled")
+    assert cruncher.changes[0] == [(start, start + len("misspelled"), "missspelled", "misspelled", "spellcheck")]
+
+
+def test_batch_spellcheck_tracks_one_row():
+    cleaned, changes = DreamCruncher.run_batch(
+        [REPORT], steps=("spellcheck",), auto_accept=True, lookup_cache_path=":memory:", spell_workers=0
+    )
+    assert cleaned == ["I had a dream.\nIt was  misspelled here.\n\nThe end."]
+    assert len(changes) == 1
+    assert (changes.loc[0, "old_text"], changes.loc[0, "new_text"]) == ("missspelled", "misspelled")
+
+
+def test_spelling_edits_cover_only_the_corrected_words():
+    cruncher = DreamCruncher([], [], gui=False, lookup_cache_path=":memory:", spell_workers=0)
+    text = "It was (missspelled), really  missspelled."
+    edits = cruncher.spelling_edits(text)
+
+    first, second = text.index("missspelled"), text.rindex("missspelled")
+    assert edits == [(first, first + 11, "misspelled"), (second, second + 11, "misspelled")]
+    for start, end, repl in reversed(edits):
+        text = text[:start] + repl + text[end:]
+    assert text == cruncher.correct_spelling("It was (missspelled), really  missspelled.")
+
+
+def test_diff_spans_edit_words_not_their_punctuation():
+    assert diff_spans("a (teh) b", "a (the) b") == [(3, 6, "the")]
+    assert diff_spans("one teh, two teh.", "one the, two the.") == [(4, 7, "the"), (13, 16, "the")]
+    assert diff_spans("a  b", "a b") == [(2, 3, "")]
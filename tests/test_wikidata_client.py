@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from dreamcruncher import WikidataClient
+
+
+class StubWikidata:
+    """Local stand-in for wbsearchentities answering from a list of (status, body or delay)."""
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                status, body = stub.answers.pop(0) if stub.answers else (200, {"search": []})
+                if status == "slow":
+                    time.sleep(body)
+                    status, body = 200, {"search": []}
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the client timed out
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/w/api.php"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    stubs = []
+
+    def make(answers):
+        stubs.append(StubWikidata(answers))
+        return stubs[-1]
+
+    yield make
+    for s in stubs:
+        s.close()
+
+
+def test_search_returns_lowercase_description(stub):
+    server = stub([(200, {"search": [{"description": "American Actor"}]})])
+    client = WikidataClient(server.url, rate=0)
+    assert client.search("Tom Hanks") == "american actor"
+    assert client.search("Nobody") is None
+
+
+def test_retries_server_errors_with_backoff(stub):
+    server = stub([(503, {}), (429, {}), (200, {"search": [{"description": "city in France"}]})])
+    client = WikidataClient(server.url, rate=0, retries=3, backoff=0.05)
+    start = time.monotonic()
+    assert client.search("Paris") == "city in france"
+    assert server.requests == 3
+    assert time.monotonic() - start >= 0.05 + 0.1  # backoff doubles per attempt
+
+
+def test_gives_up_after_retries(stub):
+    server = stub([(500, {})] * 3)
+    client = WikidataClient(server.url, rate=0, retries=2, backoff=0.01)
+    with pytest.raises(requests.HTTPError):
+        client.search("Paris")
+    assert server.requests == 3
+
+
+def test_unreachable_host_cools_down(stub):
+    server = stub([("slow", 0.5)] * 2)
+    client = WikidataClient(server.url, rate=0, retries=1, backoff=0.01, timeout=0.1, cooldown=60)
+    with pytest.raises(requests.Timeout):
+        client.search("Paris")
+    assert server.requests == 2
+
+    # further lookups fail fast without a request
+    with pytest.raises(requests.ConnectionError):
+        client.search("Paris")
+    assert client.search_many(["Paris", "Rome"]) == {}
+    assert server.requests == 2